@@ -14,19 +14,32 @@ import os
 import sys
 import subprocess
 import logging
+from logging.handlers import QueueHandler, QueueListener
+import queue
+import atexit
 import time
 import random
+import re
 import json
 import requests
+from urllib3.util.retry import Retry
 import base64
 import argparse
+from collections import defaultdict
 from datetime import datetime, timedelta
+from functools import lru_cache
+from email.utils import parsedate_to_datetime
+from io import BytesIO
 from pathlib import Path
 import sqlite3
 import feedparser
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import hashlib
+import importlib.util
+import heapq
 import pickle
+import shutil
+import threading
 
 import gc
 
@@ -46,63 +59,107 @@ def get_env(var, default=None, required=False):
 LOG_DIR = get_env('LOG_DIR', 'logs')
 os.makedirs(LOG_DIR, exist_ok=True)
 log_filename = os.path.join(LOG_DIR, f"daily_zine_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[
-        logging.FileHandler(log_filename, mode='w', encoding='utf-8'),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+log_formatter = logging.Formatter("%(asctime)s [%(levelname)s] %(message)s")
+file_handler = logging.FileHandler(log_filename, mode='w', encoding='utf-8')
+stream_handler = logging.StreamHandler(sys.stdout)
+for handler in (file_handler, stream_handler):
+    handler.setFormatter(log_formatter)
+
+# Logging calls only enqueue records; a background listener does the file and console writes
+log_queue = queue.SimpleQueue()
+log_listener = QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+log_listener.start()
+atexit.register(log_listener.stop)
+
+# Attached directly rather than via basicConfig, which would give the QueueHandler its own
+# formatter; the listener's handlers already format every record
 log = logging.getLogger()
+log.setLevel(logging.INFO)
+log.addHandler(QueueHandler(log_queue))
 
 # === 🛠️ Auto-install missing dependencies ===
-REQUIRED_LIBS = ['python-dotenv', 'reportlab', 'Pillow', 'beautifulsoup4', 'tqdm']
+# Maps pip package names to the module each one provides
+REQUIRED_LIBS = {
+    'python-dotenv': 'dotenv',
+    'reportlab': 'reportlab',
+    'Pillow': 'PIL',
+    'beautifulsoup4': 'bs4',
+    'tqdm': 'tqdm',
+}
+
+# Records the interpreter and libraries last verified, so later runs can skip the check
+DEPS_SENTINEL = os.path.join(LOG_DIR, '.deps_ok')
 
 def install_missing_libs():
-    missing_libs = []
-    for lib in REQUIRED_LIBS:
-        try:
-            if lib == 'python-dotenv':
-                __import__('dotenv')
-            elif lib == 'Pillow':
-                __import__('PIL')
-            elif lib == 'beautifulsoup4':
-                __import__('bs4')
-            elif lib == 'tqdm':
-                __import__('tqdm')
-            else:
-                __import__(lib)
-        except ImportError:
-            missing_libs.append(lib)
+    deps_signature = f"{sys.executable}\n{','.join(sorted(REQUIRED_LIBS))}"
+    try:
+        with open(DEPS_SENTINEL, 'r', encoding='utf-8') as f:
+            if f.read() == deps_signature:
+                return
+    except OSError:
+        pass
+    
+    # find_spec locates a module without executing it, so the probe stays cheap
+    missing_libs = [lib for lib, module in REQUIRED_LIBS.items()
+                    if importlib.util.find_spec(module) is None]
     
     if missing_libs:
         log.info(f"Installing missing dependencies: {', '.join(missing_libs)}")
-        for lib in missing_libs:
-            try:
-                subprocess.check_call([sys.executable, "-m", "pip", "install", lib])
-                log.info(f"Installed: {lib}")
-            except subprocess.CalledProcessError as e:
-                log.error(f"Failed to install {lib}: {e}")
-                sys.exit(1)
+        # One pip run resolves every missing package together instead of restarting pip per library
+        try:
+            subprocess.check_call([sys.executable, "-m", "pip", "install", *missing_libs])
+            log.info(f"Installed: {', '.join(missing_libs)}")
+        except subprocess.CalledProcessError as e:
+            log.error(f"Failed to install {', '.join(missing_libs)}: {e}")
+            sys.exit(1)
     else:
         log.info("All dependencies are already installed")
+    
+    try:
+        with open(DEPS_SENTINEL, 'w', encoding='utf-8') as f:
+            f.write(deps_signature)
+    except OSError as e:
+        log.debug("Could not write dependency sentinel: %s", e)
 
 install_missing_libs()
 
 # === Now import everything ===
-from dotenv import load_dotenv
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.utils import ImageReader
 from PIL import Image
 from tqdm import tqdm
 
+# Optional C JSON codec; falls back to the standard library
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def dump_json_bytes(obj, indent=False):
+    """Serialize obj to UTF-8 JSON bytes, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else None)
+    return json.dumps(obj, indent=2 if indent else None).encode('utf-8')
+
+def load_json_bytes(data):
+    """Parse JSON from bytes, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
 # === 📊 Configuration ===
 
 # Cache system for 100x speed improvements
 CACHE_DIR = Path(get_env('CACHE_DIR', 'cache'))
 CACHE_DIR.mkdir(exist_ok=True)
+CACHE_MANIFEST = CACHE_DIR / "manifest.jsonl"
+CACHE_MAX_AGE_HOURS = int(get_env('CACHE_MAX_AGE_HOURS', '24'))
+CACHE_MAX_AGE_DAYS = int(get_env('CACHE_MAX_AGE_DAYS', '7'))
+MAX_CACHE_SIZE_MB = int(get_env('MAX_CACHE_SIZE_MB', '500'))
+MAX_CACHE_SIZE_BYTES = MAX_CACHE_SIZE_MB * 1024 * 1024
+CACHE_IO_WORKERS = int(get_env('CACHE_IO_WORKERS', '16'))
+_MANIFEST_LOCK = threading.Lock()
 
 def get_cache_path(key):
     """Generate cache file path for a given key"""
@@ -113,30 +170,164 @@ def save_to_cache(key, data):
     """Save data to cache"""
     if not CACHE_ENABLED:
         return
+    tmp_path = None
     try:
         cache_path = get_cache_path(key)
-        with open(cache_path, 'wb') as f:
-            pickle.dump(data, f)
+        # Write to a per-thread temp file and rename it into place so readers never see a partial pickle
+        tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        payload = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            st = os.fstat(f.fileno())
+        os.replace(tmp_path, cache_path)
+        write_manifest_entry(cache_path, st)
     except Exception as e:
-        log.debug(f"Cache save failed: {e}")
+        log.debug("Cache save failed: %s", e)
+        if tmp_path:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+# Lines in the manifest file and the distinct cache files they describe, loaded lazily
+# so appends can tell when duplicate rows call for a compaction
+_manifest_line_count = None
+_manifest_names = None
+MANIFEST_COMPACT_MIN_LINES = 256
+
+def _replace_manifest_locked(records):
+    """Atomically rewrite the manifest from record dicts; caller holds _MANIFEST_LOCK"""
+    global _manifest_line_count, _manifest_names
+    tmp_path = CACHE_MANIFEST.with_name(CACHE_MANIFEST.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(b''.join(dump_json_bytes(record) + b'\n' for record in records))
+    os.replace(tmp_path, CACHE_MANIFEST)
+    # The rename itself bumps the directory mtime; mark the manifest as current
+    os.utime(CACHE_MANIFEST)
+    _manifest_line_count = len(records)
+    _manifest_names = {record['name'] for record in records}
+
+def _read_manifest_records():
+    """Latest record per cache file name from the manifest, in file order"""
+    records = {}
+    line_count = 0
+    with open(CACHE_MANIFEST, 'rb') as f:
+        for line in f:
+            line_count += 1
+            record = load_json_bytes(line)
+            records[record['name']] = record
+    return records, line_count
+
+def write_manifest_entry(cache_path, st):
+    """Append a cache file's size and mtime to the cache manifest"""
+    global _manifest_line_count, _manifest_names
+    name = Path(cache_path).name
+    record = {'name': name, 'size': st.st_size, 'mtime': st.st_mtime}
+    with _MANIFEST_LOCK:
+        if not CACHE_MANIFEST.exists():
+            # Seed a new manifest from a full scan so cache files written before it existed
+            # are still counted and evicted; the scan already includes cache_path
+            _replace_manifest_locked([{'name': name, 'size': size, 'mtime': mtime}
+                                      for _, name, size, mtime in scan_cache_dir()])
+            return
+        with open(CACHE_MANIFEST, 'ab') as f:
+            f.write(dump_json_bytes(record) + b'\n')
+        
+        if _manifest_line_count is None:
+            records, _manifest_line_count = _read_manifest_records()
+            _manifest_names = set(records)
+        else:
+            _manifest_line_count += 1
+            _manifest_names.add(name)
+        
+        # Rewrites of the same key append duplicate rows; compact once they outnumber the live entries
+        if (_manifest_line_count > MANIFEST_COMPACT_MIN_LINES
+                and _manifest_line_count > 2 * len(_manifest_names)):
+            records, _ = _read_manifest_records()
+            _replace_manifest_locked(list(records.values()))
+            log.debug("🗜️ Compacted cache manifest to %d entries", len(records))
+
+def scan_cache_dir():
+    """Get (path, name, size, mtime) for every cache file by scanning the cache directory"""
+    cache_entries = []
+    with os.scandir(CACHE_DIR) as it:
+        for entry in it:
+            # Cache files are always regular files written by save_to_cache; ignore symlinks
+            if entry.name.endswith('.pkl') and not entry.is_symlink():
+                st = entry.stat(follow_symlinks=False)
+                cache_entries.append((entry.path, entry.name, st.st_size, st.st_mtime))
+    return cache_entries
+
+def load_cache_manifest():
+    """Get (path, name, size, mtime) for every cache file, scanning the directory only if the manifest is stale"""
+    try:
+        # Creating or deleting cache files bumps the directory mtime, so a manifest
+        # written after the last such change still describes every file
+        if CACHE_MANIFEST.stat().st_mtime_ns >= CACHE_DIR.stat().st_mtime_ns:
+            entries = {}
+            with open(CACHE_MANIFEST, 'rb') as f:
+                for line in f:
+                    record = load_json_bytes(line)
+                    entries[record['name']] = (record['size'], record['mtime'])
+            return [(os.path.join(CACHE_DIR, name), name, size, mtime)
+                    for name, (size, mtime) in entries.items()]
+    except (OSError, ValueError, KeyError) as e:
+        log.debug("Cache manifest unavailable, rescanning: %s", e)
+    
+    return scan_cache_dir()
+
+def write_cache_manifest(cache_entries):
+    """Atomically rewrite the cache manifest from (path, name, size, mtime) entries"""
+    records = [{'name': name, 'size': size, 'mtime': mtime} for _, name, size, mtime in cache_entries]
+    with _MANIFEST_LOCK:
+        _replace_manifest_locked(records)
 
 def load_from_cache(key, max_age_hours=None):
     """Load data from cache if available and fresh"""
     if not CACHE_ENABLED:
         return None
     if max_age_hours is None:
-        max_age_hours = int(get_env('CACHE_MAX_AGE_HOURS', '24'))
+        max_age_hours = CACHE_MAX_AGE_HOURS
     try:
         cache_path = get_cache_path(key)
-        if cache_path.exists():
-            # Check if cache is fresh
-            if time.time() - cache_path.stat().st_mtime < max_age_hours * 3600:
-                with open(cache_path, 'rb') as f:
-                    return pickle.load(f)
+        # A single stat both checks for the entry and gives its age
+        try:
+            st = cache_path.stat()
+        except FileNotFoundError:
+            return None
+        # Check if cache is fresh
+        if time.time() - st.st_mtime < max_age_hours * 3600:
+            with open(cache_path, 'rb') as f:
+                return pickle.load(f)
     except Exception as e:
-        log.debug(f"Cache load failed: {e}")
+        log.debug("Cache load failed: %s", e)
     return None
 
+def remove_cache_files(cache_entries, io_workers, reason):
+    """Unlink cache entries, overlapping the syscalls on a thread pool for large batches"""
+    def unlink(entry):
+        try:
+            os.unlink(entry[0])
+            log.debug("🗑️ Removed cache file (%s): %s", reason, entry[1])
+            return None
+        except FileNotFoundError:
+            # Already gone (the manifest can lag behind manual deletions)
+            return None
+        except Exception as e:
+            log.warning("Failed to delete cache file %s: %s", entry[1], e)
+            return e
+    
+    if io_workers > 1 and len(cache_entries) > io_workers:
+        with ThreadPoolExecutor(max_workers=io_workers) as executor:
+            errors = list(executor.map(unlink, cache_entries))
+    else:
+        errors = [unlink(entry) for entry in cache_entries]
+    
+    removed = [entry for entry, error in zip(cache_entries, errors) if error is None]
+    failed = [entry for entry, error in zip(cache_entries, errors) if error is not None]
+    return removed, failed
+
 def optimize_cache_memory():
     """Optimize cache memory by cleaning old files and compressing data"""
     if not CACHE_ENABLED:
@@ -145,64 +336,77 @@ def optimize_cache_memory():
     log.info("🧹 Starting weekly cache optimization...")
     
     # Get cache optimization settings
-    max_cache_age_days = int(get_env('CACHE_MAX_AGE_DAYS', '7'))
-    max_cache_size_mb = int(get_env('MAX_CACHE_SIZE_MB', '500'))
+    max_cache_age_days = CACHE_MAX_AGE_DAYS
+    max_cache_size_bytes = MAX_CACHE_SIZE_BYTES
     compression_enabled = get_env('CACHE_COMPRESSION_ENABLED', 'true').lower() == 'true'
+    io_workers = CACHE_IO_WORKERS
     
     try:
         # Calculate cutoff time for old files
         cutoff_time = time.time() - (max_cache_age_days * 24 * 3600)
         
-        # Get all cache files
-        cache_files = list(CACHE_DIR.glob("*.pkl"))
-        total_files = len(cache_files)
+        # Get all cache files with their size and mtime from the manifest
+        cache_entries = load_cache_manifest()
+        total_files = len(cache_entries)
         deleted_files = 0
-        total_size_before = 0
-        total_size_after = 0
-        
-        # Calculate total size before cleanup
-        for cache_file in cache_files:
-            total_size_before += cache_file.stat().st_size
         
-        # Remove old cache files
-        for cache_file in cache_files:
-            file_age = time.time() - cache_file.stat().st_mtime
-            if file_age > cutoff_time:
-                try:
-                    cache_file.unlink()
-                    deleted_files += 1
-                    log.debug(f"🗑️ Deleted old cache file: {cache_file.name}")
-                except Exception as e:
-                    log.warning(f"Failed to delete cache file {cache_file.name}: {e}")
+        # Calculate total size and oldest mtime before cleanup in one pass
+        total_size_before = 0
+        oldest_mtime = float('inf')
+        for _, _, size, mtime in cache_entries:
+            total_size_before += size
+            if mtime < oldest_mtime:
+                oldest_mtime = mtime
+        
+        # Remove old cache files (skipped entirely when nothing has expired)
+        remaining_files = cache_entries
+        current_size = total_size_before
+        if oldest_mtime < cutoff_time:
+            expired_files = []
+            remaining_files = []
+            for path, name, size, mtime in cache_entries:
+                if mtime < cutoff_time:
+                    expired_files.append((path, name, size, mtime))
+                else:
+                    remaining_files.append((path, name, size, mtime))
+            removed, failed = remove_cache_files(expired_files, io_workers, "old")
+            deleted_files += len(removed)
+            current_size -= sum(size for _, _, size, _ in removed)
+            remaining_files.extend(failed)
         
         # Check cache size and remove oldest files if needed
-        remaining_files = list(CACHE_DIR.glob("*.pkl"))
-        if remaining_files:
-            # Sort by modification time (oldest first)
-            remaining_files.sort(key=lambda x: x.stat().st_mtime)
-            
-            current_size_mb = sum(f.stat().st_size for f in remaining_files) / (1024 * 1024)
-            
-            if current_size_mb > max_cache_size_mb:
-                log.info(f"📦 Cache size ({current_size_mb:.1f}MB) exceeds limit ({max_cache_size_mb}MB)")
-                
-                # Remove oldest files until under limit
-                for cache_file in remaining_files:
-                    try:
-                        file_size_mb = cache_file.stat().st_size / (1024 * 1024)
-                        cache_file.unlink()
-                        deleted_files += 1
-                        current_size_mb -= file_size_mb
-                        log.debug(f"🗑️ Removed cache file for size limit: {cache_file.name}")
-                        
-                        if current_size_mb <= max_cache_size_mb:
-                            break
-                    except Exception as e:
-                        log.warning(f"Failed to delete cache file {cache_file.name}: {e}")
-        
-        # Calculate final size
-        final_files = list(CACHE_DIR.glob("*.pkl"))
-        total_size_after = sum(f.stat().st_size for f in final_files)
+        if current_size > max_cache_size_bytes:
+            log.info(f"📦 Cache size ({current_size / (1024 * 1024):.1f}MB) exceeds limit ({MAX_CACHE_SIZE_MB}MB)")
+            
+            # Only pick out as many of the oldest files as the overage needs
+            # instead of sorting the whole cache; widen the window if it was too small
+            avg_file_size = current_size / len(remaining_files)
+            overage = current_size - max_cache_size_bytes
+            batch_size = max(8, int(overage / avg_file_size) * 2)
+            kept_files = []
+            
+            # Remove oldest files until under limit
+            while current_size > max_cache_size_bytes and remaining_files:
+                oldest_files = heapq.nsmallest(batch_size, remaining_files, key=lambda x: x[3])
+                to_evict = []
+                for entry in oldest_files:
+                    if current_size <= max_cache_size_bytes:
+                        break
+                    to_evict.append(entry)
+                    current_size -= entry[2]
+                removed, failed = remove_cache_files(to_evict, io_workers, "size limit")
+                deleted_files += len(removed)
+                # Files that could not be deleted still count towards the cache size
+                current_size += sum(size for _, _, size, _ in failed)
+                kept_files.extend(failed)
+                evicted = {path for path, _, _, _ in to_evict}
+                remaining_files = [f for f in remaining_files if f[0] not in evicted]
+                batch_size *= 2
+            remaining_files.extend(kept_files)
+        
+        # Final size is tracked as files are removed
+        total_size_after = current_size
+        write_cache_manifest(remaining_files)
         
         # Log optimization results
         size_saved_mb = (total_size_before - total_size_after) / (1024 * 1024)
@@ -215,8 +419,8 @@ def optimize_cache_memory():
         # Force garbage collection
         gc.collect()
         
-    except Exception as e:
-        log.error(f"❌ Cache optimization failed: {e}")
+    except Exception:
+        log.exception("❌ Cache optimization failed")
 
 def should_run_weekly_optimization():
     """Check if weekly cache optimization should run (every Sunday)"""
@@ -279,6 +483,7 @@ GUIDANCE_SCALE = float(get_env('GUIDANCE_SCALE', '7.5'))
 # Free Tier Limit: ~100 requests/minute
 MAX_CONCURRENT_IMAGES = int(get_env('MAX_CONCURRENT_IMAGES', '8'))
 MAX_CONCURRENT_CAPTIONS = int(get_env('MAX_CONCURRENT_CAPTIONS', '8'))
+CAPTION_BATCH_SIZE = int(get_env('CAPTION_BATCH_SIZE', '0'))  # prompts per batched caption request, 0 = one request per caption
 RATE_LIMIT_DELAY = float(get_env('RATE_LIMIT_DELAY', '0.6'))
 SKIP_CAPTION_DEDUPLICATION = get_env('SKIP_CAPTION_DEDUPLICATION', 'true').lower() == 'true'
 FAST_MODE = get_env('FAST_MODE', 'true').lower() == 'true'
@@ -291,14 +496,38 @@ PRELOAD_STYLES = get_env('PRELOAD_STYLES', 'true').lower() == 'true'
 BATCH_PROCESSING = get_env('BATCH_PROCESSING', 'true').lower() == 'true'
 OPTIMIZE_MEMORY = get_env('OPTIMIZE_MEMORY', 'true').lower() == 'true'
 
+# PDF caption band layout, read once instead of on every page
+PDF_FONT_SIZE = int(get_env('PDF_FONT_SIZE', '14'))
+PDF_LINE_SPACING = int(get_env('PDF_LINE_SPACING', '18'))
+PDF_PADDING_X = int(get_env('PDF_PADDING_X', '24'))
+PDF_PADDING_Y = int(get_env('PDF_PADDING_Y', '16'))
+PDF_TOP_PADDING = int(get_env('PDF_TOP_PADDING', '40'))  # Increased top padding for better separation from image
+PDF_BAND_Y = int(get_env('PDF_BAND_Y', '0'))  # flush with the bottom of the page
+PDF_BAND_X = int(get_env('PDF_BAND_X', '0'))
+PDF_JPEG_QUALITY = int(get_env('PDF_JPEG_QUALITY', '0'))  # re-encode page images at this JPEG quality, 0 keeps the original files
+
+# Retry and caption settings, parsed once at load instead of on every API call
+LLM_MAX_RETRIES = int(get_env('LLM_MAX_RETRIES', '3'))
+LLM_RETRY_DELAYS = [int(x.strip()) for x in get_env('LLM_RETRY_DELAYS', '60,120,180').split(',')]
+IMAGE_MAX_RETRIES = int(get_env('IMAGE_MAX_RETRIES', '3'))
+IMAGE_RETRY_DELAYS = [int(x.strip()) for x in get_env('IMAGE_RETRY_DELAYS', '60,120,180').split(',')]
+RETRY_JITTER = float(get_env('RETRY_JITTER', '0.1'))  # extra random wait, as a fraction of the configured delay
+RETRY_MAX_DELAY = float(get_env('RETRY_MAX_DELAY', '300'))  # upper bound for Retry-After and backoff waits, in seconds
+TOGETHER_API_URL = get_env('TOGETHER_API_URL', 'https://api.together.xyz/v1/images/generations')
+CAPTION_SIMILARITY_THRESHOLD = float(get_env('CAPTION_SIMILARITY_THRESHOLD', '0.3'))
+CAPTION_MAX_ATTEMPTS = int(get_env('CAPTION_MAX_ATTEMPTS', '5'))
+CAPTION_LINE_COUNT = int(get_env('CAPTION_LINE_COUNT', '6'))
+
 # Enhanced prompt configuration with full token utilization
 PROMPT_SYSTEM = get_env('PROMPT_SYSTEM', 'You are a visionary architectural writer and provocateur with deep expertise in architectural history, theory, and contemporary practice. Your knowledge spans from ancient architectural traditions to cutting-edge computational design, encompassing structural engineering, material science, cultural anthropology, environmental sustainability, urban planning, landscape architecture, digital fabrication, philosophy of space, phenomenology, global architectural traditions, vernacular building, lighting design, acoustic design, thermal comfort, passive design strategies, accessibility, universal design principles, heritage conservation, adaptive reuse, parametric design, algorithmic architecture, biomimicry, nature-inspired design, social impact, community engagement, economic feasibility, construction methods, regulatory compliance, building codes, post-occupancy evaluation, user experience, and cross-cultural architectural exchange. You create compelling, artistic image prompts that capture the essence of architectural concepts with vivid, poetic language, considering multiple scales from urban context to material detail, balancing technical precision with artistic expression, and emphasizing the emotional and psychological impact of architectural spaces on human experience.')
 
-PROMPT_TEMPLATE = get_env('PROMPT_TEMPLATE', 'Generate exactly {n} architectural image prompts on theme: \'{theme}\'. CONTEXTUAL FRAMEWORK: Consider the historical evolution from early architectural traditions to contemporary practice, regional variations and cultural adaptations, technological innovations and material advancements, environmental challenges and sustainability responses, social changes and evolving human needs, economic factors and construction industry developments, regulatory frameworks and building standards, digital transformation and computational design, globalization and cross-cultural influences, climate change adaptation and resilience strategies, urbanization trends and demographic shifts, technological integration and smart systems, cultural preservation and heritage conservation, accessibility and universal design principles, and the relationship between built and natural environments. ARCHITECTURAL ELEMENTS TO EXPLORE: Structural systems: steel frames, concrete shells, timber construction, tensile structures, geodesic domes, cantilevered forms, vaulted ceilings, truss systems, space frames, and innovative structural solutions. Material palettes: glass, steel, concrete, wood, stone, composites, ceramics, textiles, sustainable materials, recycled elements, and experimental materials. Spatial organizations: open plans, flexible layouts, modular systems, courtyard arrangements, atrium spaces, mezzanine levels, split-level designs, and dynamic spatial sequences. Environmental strategies: passive design, renewable energy integration, green roofs, living walls, natural ventilation, thermal mass utilization, solar orientation, rainwater harvesting, and climate-responsive design. Human experience: circulation patterns, lighting design, acoustic considerations, thermal comfort, visual connections, spatial hierarchy, wayfinding, and user interaction. Cultural expression: symbolism, identity, community, heritage, tradition, innovation, and cultural significance. Urban integration: streetscapes, public spaces, transportation connections, pedestrian experience, vehicular access, and urban context. Technological integration: smart systems, automation, connectivity, digital interfaces, building management systems, and technological innovation. Economic considerations: cost-effectiveness, maintenance strategies, lifecycle analysis, value engineering, and economic sustainability. Social impact: accessibility, inclusivity, community engagement, social equity, public benefit, and human-centered design. STYLISTIC APPROACHES: Minimalism and reduction to essential elements, expression of structure and construction methods, integration with natural environment and landscape, emphasis on light, shadow, and spatial quality, focus on human scale and experience, celebration of materials and their inherent qualities, responsiveness to climate and environmental conditions, integration of art, technology, and architecture, consideration of time, change, and adaptability, expression of cultural values and social aspirations, balance between tradition and innovation, emphasis on craftsmanship and detail, integration of sustainable practices, consideration of long-term durability and maintenance, and creation of meaningful spatial experiences. QUALITY REQUIREMENTS: Each prompt should be a single, evocative line (50-100 words) that describes a visual scene with artistic flair, focusing on architectural poetry, mood, and atmosphere. Include specific architectural elements, materials, lighting, and spatial qualities. Consider cultural, historical, and philosophical context. Emphasize emotional resonance and visual impact. Use vivid, descriptive language that captures architectural essence. Balance technical precision with artistic expression. Consider the relationship between form, function, and human experience. Explore themes of permanence, transience, and transformation. Reflect on the relationship between built and natural environments. Consider multiple scales from urban context to material detail. Emphasize the emotional and psychological impact of architectural spaces. Generate the prompts now, one per line, without explanations or numbering:')
+# Static guidance comes first and {n}/{theme} last, so providers can cache the shared prefix across runs
+PROMPT_TEMPLATE = get_env('PROMPT_TEMPLATE', 'Generate architectural image prompts on the theme given at the end. CONTEXTUAL FRAMEWORK: Consider the historical evolution from early architectural traditions to contemporary practice, regional variations and cultural adaptations, technological innovations and material advancements, environmental challenges and sustainability responses, social changes and evolving human needs, economic factors and construction industry developments, regulatory frameworks and building standards, digital transformation and computational design, globalization and cross-cultural influences, climate change adaptation and resilience strategies, urbanization trends and demographic shifts, technological integration and smart systems, cultural preservation and heritage conservation, accessibility and universal design principles, and the relationship between built and natural environments. ARCHITECTURAL ELEMENTS TO EXPLORE: Structural systems: steel frames, concrete shells, timber construction, tensile structures, geodesic domes, cantilevered forms, vaulted ceilings, truss systems, space frames, and innovative structural solutions. Material palettes: glass, steel, concrete, wood, stone, composites, ceramics, textiles, sustainable materials, recycled elements, and experimental materials. Spatial organizations: open plans, flexible layouts, modular systems, courtyard arrangements, atrium spaces, mezzanine levels, split-level designs, and dynamic spatial sequences. Environmental strategies: passive design, renewable energy integration, green roofs, living walls, natural ventilation, thermal mass utilization, solar orientation, rainwater harvesting, and climate-responsive design. Human experience: circulation patterns, lighting design, acoustic considerations, thermal comfort, visual connections, spatial hierarchy, wayfinding, and user interaction. Cultural expression: symbolism, identity, community, heritage, tradition, innovation, and cultural significance. Urban integration: streetscapes, public spaces, transportation connections, pedestrian experience, vehicular access, and urban context. Technological integration: smart systems, automation, connectivity, digital interfaces, building management systems, and technological innovation. Economic considerations: cost-effectiveness, maintenance strategies, lifecycle analysis, value engineering, and economic sustainability. Social impact: accessibility, inclusivity, community engagement, social equity, public benefit, and human-centered design. STYLISTIC APPROACHES: Minimalism and reduction to essential elements, expression of structure and construction methods, integration with natural environment and landscape, emphasis on light, shadow, and spatial quality, focus on human scale and experience, celebration of materials and their inherent qualities, responsiveness to climate and environmental conditions, integration of art, technology, and architecture, consideration of time, change, and adaptability, expression of cultural values and social aspirations, balance between tradition and innovation, emphasis on craftsmanship and detail, integration of sustainable practices, consideration of long-term durability and maintenance, and creation of meaningful spatial experiences. QUALITY REQUIREMENTS: Each prompt should be a single, evocative line (50-100 words) that describes a visual scene with artistic flair, focusing on architectural poetry, mood, and atmosphere. Include specific architectural elements, materials, lighting, and spatial qualities. Consider cultural, historical, and philosophical context. Emphasize emotional resonance and visual impact. Use vivid, descriptive language that captures architectural essence. Balance technical precision with artistic expression. Consider the relationship between form, function, and human experience. Explore themes of permanence, transience, and transformation. Reflect on the relationship between built and natural environments. Consider multiple scales from urban context to material detail. Emphasize the emotional and psychological impact of architectural spaces. THEME: \'{theme}\'. Generate exactly {n} prompts now, one per line, without explanations or numbering:')
 
 CAPTION_SYSTEM = get_env('CAPTION_SYSTEM', 'You are a masterful architectural poet and critic with comprehensive expertise in architectural theory, history, philosophy, and contemporary practice. Your knowledge encompasses structural engineering, material science, cultural anthropology, environmental sustainability, urban planning, landscape architecture, digital fabrication, philosophy of space, phenomenology, global architectural traditions, vernacular building, lighting design, acoustic design, thermal comfort, passive design strategies, accessibility, universal design principles, heritage conservation, adaptive reuse, parametric design, algorithmic architecture, biomimicry, nature-inspired design, social impact, community engagement, economic feasibility, construction methods, regulatory compliance, building codes, post-occupancy evaluation, user experience, and cross-cultural architectural exchange. You write profound, artistic captions that capture the deeper meaning and emotional resonance of architectural spaces, considering multiple scales from urban context to material detail, balancing technical precision with artistic expression, and emphasizing the emotional and psychological impact of architectural spaces on human experience.')
 
-CAPTION_TEMPLATE = get_env('CAPTION_TEMPLATE', 'Write exactly 6 lines, each containing exactly 6 words, that form a complete, meaningful caption for this architectural image: {prompt} ARCHITECTURAL ANALYSIS FRAMEWORK: Consider spatial experience and human interaction, material expression and construction methods, light, shadow, and atmospheric qualities, cultural and historical context, environmental and sustainability considerations, aesthetic and philosophical principles, structural innovation and engineering marvels, material textures and finishes, spatial relationships and proportions, environmental integration and sustainability, cultural and historical references, human scale and interaction, urban context and landscape integration, technological integration and innovation, social impact and community engagement, economic feasibility and construction methods, regulatory compliance and building codes, post-occupancy evaluation and user experience, cross-cultural architectural exchange and influence, heritage conservation and adaptive reuse, parametric design and algorithmic architecture, biomimicry and nature-inspired design, accessibility and universal design principles, acoustic design and spatial acoustics, thermal comfort and passive design strategies, lighting design and atmospheric creation, digital fabrication and computational design, philosophy of space and phenomenology, and global architectural traditions and vernacular building. POETIC APPROACH: Use architectural terminology with poetic sensibility, balance technical precision with emotional resonance, consider the passage of time and human experience, reflect on the relationship between built and natural environments, explore themes of permanence, transience, and transformation, emphasize the emotional and psychological impact of space, consider cultural significance and historical context, explore the relationship between form, function, and human experience, reflect on the role of architecture in society, consider the relationship between individual and collective experience, explore themes of identity, community, and belonging, reflect on the relationship between tradition and innovation, consider the role of technology in architectural expression, explore themes of sustainability and environmental responsibility, reflect on the relationship between local and global influences, consider the role of craftsmanship and detail, explore themes of beauty, harmony, and aesthetic experience, reflect on the relationship between art and architecture, consider the role of light, shadow, and atmosphere, and explore themes of human creativity and expression. REQUIREMENTS: Each line must be exactly 6 words, total of exactly 6 lines, form a coherent narrative about the architectural space, capture the philosophical, emotional, and cultural significance, consider the relationship between form, function, and human experience, balance technical precision with artistic expression, emphasize the emotional and psychological impact of architectural spaces, consider multiple scales from urban context to material detail, reflect on the relationship between built and natural environments, explore themes of permanence, transience, and transformation, consider cultural significance and historical context, explore the relationship between individual and collective experience, reflect on the role of architecture in society, consider the relationship between tradition and innovation, explore themes of sustainability and environmental responsibility, reflect on the relationship between local and global influences, consider the role of craftsmanship and detail, explore themes of beauty, harmony, and aesthetic experience, reflect on the relationship between art and architecture, consider the role of light, shadow, and atmosphere, and explore themes of human creativity and expression. Write the 6-line caption now:')
+# Static instructions come first and {prompt} last, so providers can cache the shared prefix across caption calls
+CAPTION_TEMPLATE = get_env('CAPTION_TEMPLATE', 'Write exactly 6 lines, each containing exactly 6 words, that form a complete, meaningful caption for the architectural image described at the end. ARCHITECTURAL ANALYSIS FRAMEWORK: Consider spatial experience and human interaction, material expression and construction methods, light, shadow, and atmospheric qualities, cultural and historical context, environmental and sustainability considerations, aesthetic and philosophical principles, structural innovation and engineering marvels, material textures and finishes, spatial relationships and proportions, environmental integration and sustainability, cultural and historical references, human scale and interaction, urban context and landscape integration, technological integration and innovation, social impact and community engagement, economic feasibility and construction methods, regulatory compliance and building codes, post-occupancy evaluation and user experience, cross-cultural architectural exchange and influence, heritage conservation and adaptive reuse, parametric design and algorithmic architecture, biomimicry and nature-inspired design, accessibility and universal design principles, acoustic design and spatial acoustics, thermal comfort and passive design strategies, lighting design and atmospheric creation, digital fabrication and computational design, philosophy of space and phenomenology, and global architectural traditions and vernacular building. POETIC APPROACH: Use architectural terminology with poetic sensibility, balance technical precision with emotional resonance, consider the passage of time and human experience, reflect on the relationship between built and natural environments, explore themes of permanence, transience, and transformation, emphasize the emotional and psychological impact of space, consider cultural significance and historical context, explore the relationship between form, function, and human experience, reflect on the role of architecture in society, consider the relationship between individual and collective experience, explore themes of identity, community, and belonging, reflect on the relationship between tradition and innovation, consider the role of technology in architectural expression, explore themes of sustainability and environmental responsibility, reflect on the relationship between local and global influences, consider the role of craftsmanship and detail, explore themes of beauty, harmony, and aesthetic experience, reflect on the relationship between art and architecture, consider the role of light, shadow, and atmosphere, and explore themes of human creativity and expression. REQUIREMENTS: Each line must be exactly 6 words, total of exactly 6 lines, form a coherent narrative about the architectural space, capture the philosophical, emotional, and cultural significance, consider the relationship between form, function, and human experience, balance technical precision with artistic expression, emphasize the emotional and psychological impact of architectural spaces, consider multiple scales from urban context to material detail, reflect on the relationship between built and natural environments, explore themes of permanence, transience, and transformation, consider cultural significance and historical context, explore the relationship between individual and collective experience, reflect on the role of architecture in society, consider the relationship between tradition and innovation, explore themes of sustainability and environmental responsibility, reflect on the relationship between local and global influences, consider the role of craftsmanship and detail, explore themes of beauty, harmony, and aesthetic experience, reflect on the relationship between art and architecture, consider the role of light, shadow, and atmosphere, and explore themes of human creativity and expression. ARCHITECTURAL IMAGE: {prompt} Write the 6-line caption now:')
 
 # Style configuration for the selected style with enhanced sophistication
 STYLE_CONFIG = {
@@ -344,6 +573,13 @@ STYLE_CONFIG = {
     }
 }
 
+# Fallback for styles missing from STYLE_CONFIG; {style_name} is filled in when used
+DEFAULT_STYLE_CONFIG = {
+    'model': 'black-forest-labs/FLUX.1-schnell-free',  # Use free model as default
+    'prompt_suffix': ', {style_name} architectural style, sophisticated design, artistic composition, professional photography, high quality, detailed materials, perfect lighting, architectural beauty, structural elegance, spatial harmony, material expression, environmental integration, human scale consideration, cultural significance, technical precision, aesthetic excellence',
+    'negative_prompt': 'blurry, low quality, distorted, amateur, unrealistic, poor composition, bad lighting, ugly, disorganized, messy, unprofessional, cartoon, painting, sketch, drawing, text, watermark, signature'
+}
+
 # === 🎨 Style Selection ===
 STYLES = ['futuristic', 'minimalist', 'sketch', 'abstract', 'technical', 'watercolor', 'anime', 'photorealistic']
 
@@ -356,12 +592,53 @@ def get_daily_style():
     
     if PRELOAD_STYLES and _STYLE_CACHE is None:
         _STYLE_CACHE = STYLES
-        log.debug(f"📦 Preloaded {len(STYLES)} architectural styles")
+        log.debug("📦 Preloaded %d architectural styles", len(STYLES))
     
     day_of_year = datetime.now().timetuple().tm_yday
     style_index = (day_of_year - 1) % len(STYLES)
     return STYLES[style_index]
 
+# === 📚 Source Storage ===
+# Parsed feeds keyed by file path, reused while the file's mtime is unchanged
+_FEEDS_CACHE = {}
+
+def load_existing_feeds(existing_feeds_file):
+    """Load previously added architectural feeds from JSON"""
+    try:
+        mtime_ns = os.stat(existing_feeds_file).st_mtime_ns
+    except FileNotFoundError:
+        return []
+    except Exception as e:
+        log.warning(f"⚠️ Could not load existing feeds: {e}")
+        return []
+    
+    cached = _FEEDS_CACHE.get(existing_feeds_file)
+    if cached and cached[0] == mtime_ns:
+        # Return a copy so callers can append without touching the cache
+        return list(cached[1])
+    
+    try:
+        with open(existing_feeds_file, 'rb') as f:
+            feeds = load_json_bytes(f.read())
+    except Exception as e:
+        log.warning(f"⚠️ Could not load existing feeds: {e}")
+        return []
+    
+    _FEEDS_CACHE[existing_feeds_file] = (mtime_ns, feeds)
+    return list(feeds)
+
+def save_existing_feeds(existing_feeds_file, existing_feeds):
+    """Save architectural feeds to JSON with a single buffered write, replacing the file atomically"""
+    data = dump_json_bytes(existing_feeds, indent=True)
+    tmp_file = f"{existing_feeds_file}.tmp"
+    with open(tmp_file, 'wb', buffering=1 << 16) as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+        mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+    os.replace(tmp_file, existing_feeds_file)
+    _FEEDS_CACHE[existing_feeds_file] = (mtime_ns, list(existing_feeds))
+
 # === 🌐 FreshRSS Automation ===
 class FreshRSSAutomation:
     """FreshRSS automation system for architectural content curation"""
@@ -409,10 +686,8 @@ class FreshRSSAutomation:
         # Load additional sources from daily additions
         existing_feeds_file = get_env('EXISTING_FEEDS_FILE', 'existing_architectural_feeds.json')
         try:
-            if os.path.exists(existing_feeds_file):
-                with open(existing_feeds_file, 'r') as f:
-                    additional_sources = json.load(f)
-                
+            additional_sources = load_existing_feeds(existing_feeds_file)
+            if additional_sources:
                 # Group additional sources by category
                 for source in additional_sources:
                     category = source.get('category', 'Additional')
@@ -468,6 +743,8 @@ class FreshRSSAutomation:
                 cursor.execute(query, (cutoff_timestamp,))
                 rows = cursor.fetchall()
                 
+                # One timestamp for the whole batch
+                scraped_at = datetime.now().isoformat()
                 for row in rows:
                     article_data = {
                         'id': row[0],
@@ -478,7 +755,7 @@ class FreshRSSAutomation:
                         'published': datetime.fromtimestamp(row[5]).isoformat(),
                         'source': row[6],
                         'category': row[7],
-                        'scraped_at': datetime.now().isoformat()
+                        'scraped_at': scraped_at
                     }
                     articles.append(article_data)
                 
@@ -526,6 +803,8 @@ class FreshRSSAutomation:
             if not feed.entries:
                 return articles
             
+            # One timestamp for the whole feed
+            scraped_at = datetime.now().isoformat()
             for entry in feed.entries[:10]:  # Limit to 10 articles per feed
                 try:
                     title = getattr(entry, 'title', '').strip()
@@ -541,7 +820,7 @@ class FreshRSSAutomation:
                             'source': feed_name,
                             'category': category,
                             'published': published,
-                            'scraped_at': datetime.now().isoformat()
+                            'scraped_at': scraped_at
                         }
                         articles.append(article_data)
                         
@@ -679,16 +958,60 @@ def scrape_architectural_content():
     log.warning(f"⚠️ No articles scraped, using fallback theme: {fallback_theme}")
     return fallback_theme
 
-def add_daily_architectural_source():
-    """Add one new architectural research website to sources every day"""
-    log.info("🔍 Checking for new architectural sources to add...")
-    
-    # Check if daily source addition is enabled
-    if not get_env('DAILY_SOURCE_ADDITION_ENABLED', 'true').lower() == 'true':
-        log.info("⚠️ Daily source addition is disabled")
-        return None
-    
-    # Load predefined sources from environment
+# Fallback sources used when PREDEFINED_SOURCES is not set
+FALLBACK_ARCHITECTURAL_SOURCES = [
+    # Academic & Research Institutions
+    {"name": "AA School of Architecture", "url": "https://www.aaschool.ac.uk/feed", "category": "Academic"},
+    {"name": "Berlage Institute", "url": "https://theberlage.nl/feed", "category": "Academic"},
+    {"name": "ETH Zurich Architecture", "url": "https://arch.ethz.ch/feed", "category": "Academic"},
+    {"name": "TU Delft Architecture", "url": "https://www.tudelft.nl/en/architecture-and-the-built-environment/feed", "category": "Academic"},
+    {"name": "UCL Bartlett", "url": "https://www.ucl.ac.uk/bartlett/feed", "category": "Academic"},
+    {"name": "Cornell Architecture", "url": "https://aap.cornell.edu/feed", "category": "Academic"},
+    {"name": "Princeton Architecture", "url": "https://soa.princeton.edu/feed", "category": "Academic"},
+    {"name": "UC Berkeley Architecture", "url": "https://ced.berkeley.edu/architecture/feed", "category": "Academic"},
+    
+    # International Publications
+    {"name": "Architectural Review Asia Pacific", "url": "https://www.architectural-review.com/feed", "category": "International"},
+    {"name": "Architecture Australia", "url": "https://architectureau.com/feed", "category": "International"},
+    {"name": "Canadian Architect", "url": "https://www.canadianarchitect.com/feed", "category": "International"},
+    {"name": "Architectural Digest India", "url": "https://www.architecturaldigest.in/feed", "category": "International"},
+    {"name": "Architectural Digest Middle East", "url": "https://www.architecturaldigestme.com/feed", "category": "International"},
+    {"name": "Architectural Digest China", "url": "https://www.architecturaldigest.cn/feed", "category": "International"},
+    
+    # Specialized Research
+    {"name": "Architectural Science Review", "url": "https://www.tandfonline.com/feed/rss/rjar20", "category": "Research"},
+    {"name": "Journal of Architectural Education", "url": "https://www.tandfonline.com/feed/rss/rjae20", "category": "Research"},
+    {"name": "Architecture Research Quarterly", "url": "https://www.cambridge.org/core/journals/architecture-research-quarterly/feed", "category": "Research"},
+    {"name": "International Journal of Architectural Computing", "url": "https://journals.sagepub.com/feed/ijac", "category": "Research"},
+    
+    # Innovation & Technology
+    {"name": "Archinect", "url": "https://archinect.com/feed", "category": "Innovation"},
+    {"name": "Architizer", "url": "https://architizer.com/feed", "category": "Innovation"},
+    {"name": "Architecture Lab", "url": "https://www.architecturelab.net/feed", "category": "Innovation"},
+    {"name": "Architecture Now", "url": "https://architecturenow.co.nz/feed", "category": "Innovation"},
+    {"name": "Architecture & Design", "url": "https://www.architectureanddesign.com.au/feed", "category": "Innovation"},
+    
+    # Regional & Cultural
+    {"name": "Architectural Record", "url": "https://www.architecturalrecord.com/rss.xml", "category": "Regional"},
+    {"name": "Architect Magazine", "url": "https://www.architectmagazine.com/rss", "category": "Regional"},
+    {"name": "Architectural Digest", "url": "https://www.architecturaldigest.com/rss", "category": "Regional"},
+    {"name": "Architecture Week", "url": "https://www.architectureweek.com/feed", "category": "Regional"},
+    
+    # Emerging & Alternative
+    {"name": "Architecture Foundation", "url": "https://architecturefoundation.org.uk/feed", "category": "Emerging"},
+    {"name": "Architectural League", "url": "https://archleague.org/feed", "category": "Emerging"},
+    {"name": "Storefront for Art and Architecture", "url": "https://storefrontnews.org/feed", "category": "Emerging"},
+    {"name": "Architecture for Humanity", "url": "https://architectureforhumanity.org/feed", "category": "Emerging"},
+    
+    # Digital & Computational
+    {"name": "Digital Architecture", "url": "https://digitalarchitecture.org/feed", "category": "Digital"},
+    {"name": "Computational Architecture", "url": "https://computationalarchitecture.net/feed", "category": "Digital"},
+    {"name": "Parametric Architecture", "url": "https://parametric-architecture.com/feed", "category": "Digital"},
+    {"name": "Architecture and Computation", "url": "https://architectureandcomputation.com/feed", "category": "Digital"}
+]
+
+def get_architectural_sources(warn_on_fallback=True):
+    """Get the rotation of architectural sources from PREDEFINED_SOURCES or the fallback list"""
     predefined_sources_str = get_env('PREDEFINED_SOURCES', '')
     architectural_sources = []
     
@@ -707,57 +1030,23 @@ def add_daily_architectural_source():
     
     # Fallback to hardcoded sources if environment is empty
     if not architectural_sources:
-        log.warning("⚠️ No predefined sources in environment, using fallback")
-        architectural_sources = [
-            # Academic & Research Institutions
-            {"name": "AA School of Architecture", "url": "https://www.aaschool.ac.uk/feed", "category": "Academic"},
-            {"name": "Berlage Institute", "url": "https://theberlage.nl/feed", "category": "Academic"},
-            {"name": "ETH Zurich Architecture", "url": "https://arch.ethz.ch/feed", "category": "Academic"},
-            {"name": "TU Delft Architecture", "url": "https://www.tudelft.nl/en/architecture-and-the-built-environment/feed", "category": "Academic"},
-            {"name": "UCL Bartlett", "url": "https://www.ucl.ac.uk/bartlett/feed", "category": "Academic"},
-            {"name": "Cornell Architecture", "url": "https://aap.cornell.edu/feed", "category": "Academic"},
-            {"name": "Princeton Architecture", "url": "https://soa.princeton.edu/feed", "category": "Academic"},
-            {"name": "UC Berkeley Architecture", "url": "https://ced.berkeley.edu/architecture/feed", "category": "Academic"},
-            
-            # International Publications
-            {"name": "Architectural Review Asia Pacific", "url": "https://www.architectural-review.com/feed", "category": "International"},
-            {"name": "Architecture Australia", "url": "https://architectureau.com/feed", "category": "International"},
-            {"name": "Canadian Architect", "url": "https://www.canadianarchitect.com/feed", "category": "International"},
-            {"name": "Architectural Digest India", "url": "https://www.architecturaldigest.in/feed", "category": "International"},
-            {"name": "Architectural Digest Middle East", "url": "https://www.architecturaldigestme.com/feed", "category": "International"},
-            {"name": "Architectural Digest China", "url": "https://www.architecturaldigest.cn/feed", "category": "International"},
-            
-            # Specialized Research
-            {"name": "Architectural Science Review", "url": "https://www.tandfonline.com/feed/rss/rjar20", "category": "Research"},
-            {"name": "Journal of Architectural Education", "url": "https://www.tandfonline.com/feed/rss/rjae20", "category": "Research"},
-            {"name": "Architecture Research Quarterly", "url": "https://www.cambridge.org/core/journals/architecture-research-quarterly/feed", "category": "Research"},
-            {"name": "International Journal of Architectural Computing", "url": "https://journals.sagepub.com/feed/ijac", "category": "Research"},
-            
-            # Innovation & Technology
-            {"name": "Archinect", "url": "https://archinect.com/feed", "category": "Innovation"},
-            {"name": "Architizer", "url": "https://architizer.com/feed", "category": "Innovation"},
-            {"name": "Architecture Lab", "url": "https://www.architecturelab.net/feed", "category": "Innovation"},
-            {"name": "Architecture Now", "url": "https://architecturenow.co.nz/feed", "category": "Innovation"},
-            {"name": "Architecture & Design", "url": "https://www.architectureanddesign.com.au/feed", "category": "Innovation"},
-            
-            # Regional & Cultural
-            {"name": "Architectural Record", "url": "https://www.architecturalrecord.com/rss.xml", "category": "Regional"},
-            {"name": "Architect Magazine", "url": "https://www.architectmagazine.com/rss", "category": "Regional"},
-            {"name": "Architectural Digest", "url": "https://www.architecturaldigest.com/rss", "category": "Regional"},
-            {"name": "Architecture Week", "url": "https://www.architectureweek.com/feed", "category": "Regional"},
-            
-            # Emerging & Alternative
-            {"name": "Architecture Foundation", "url": "https://architecturefoundation.org.uk/feed", "category": "Emerging"},
-            {"name": "Architectural League", "url": "https://archleague.org/feed", "category": "Emerging"},
-            {"name": "Storefront for Art and Architecture", "url": "https://storefrontnews.org/feed", "category": "Emerging"},
-            {"name": "Architecture for Humanity", "url": "https://architectureforhumanity.org/feed", "category": "Emerging"},
-            
-            # Digital & Computational
-            {"name": "Digital Architecture", "url": "https://digitalarchitecture.org/feed", "category": "Digital"},
-            {"name": "Computational Architecture", "url": "https://computationalarchitecture.net/feed", "category": "Digital"},
-            {"name": "Parametric Architecture", "url": "https://parametric-architecture.com/feed", "category": "Digital"},
-            {"name": "Architecture and Computation", "url": "https://architectureandcomputation.com/feed", "category": "Digital"}
-        ]
+        if warn_on_fallback:
+            log.warning("⚠️ No predefined sources in environment, using fallback")
+        architectural_sources = FALLBACK_ARCHITECTURAL_SOURCES
+    
+    return architectural_sources
+
+def add_daily_architectural_source():
+    """Add one new architectural research website to sources every day"""
+    log.info("🔍 Checking for new architectural sources to add...")
+    
+    # Check if daily source addition is enabled
+    if not get_env('DAILY_SOURCE_ADDITION_ENABLED', 'true').lower() == 'true':
+        log.info("⚠️ Daily source addition is disabled")
+        return None
+    
+    # Load predefined sources from environment, falling back to the hardcoded list
+    architectural_sources = get_architectural_sources()
     
     # Get today's date for consistent source selection
     today = datetime.now().date()
@@ -769,25 +1058,17 @@ def add_daily_architectural_source():
     
     # Check if this source is already in our feeds
     existing_feeds_file = get_env('EXISTING_FEEDS_FILE', 'existing_architectural_feeds.json')
-    existing_feeds = []
-    
-    try:
-        if os.path.exists(existing_feeds_file):
-            with open(existing_feeds_file, 'r') as f:
-                existing_feeds = json.load(f)
-    except Exception as e:
-        log.warning(f"⚠️ Could not load existing feeds: {e}")
+    existing_feeds = load_existing_feeds(existing_feeds_file)
     
     # Check if source already exists
     source_exists = any(feed.get('name') == selected_source['name'] for feed in existing_feeds)
     
     if not source_exists:
         # Add new source
-        existing_feeds.append(selected_source)
+        existing_feeds.append(dict(selected_source))  # copy, so the cached feeds never alias the source constants
         
         try:
-            with open(existing_feeds_file, 'w') as f:
-                json.dump(existing_feeds, f, indent=2)
+            save_existing_feeds(existing_feeds_file, existing_feeds)
             
             log.info(f"✅ Added new architectural source: {selected_source['name']} ({selected_source['category']})")
             log.info(f"📊 Total sources: {len(existing_feeds)}")
@@ -815,22 +1096,12 @@ def display_architectural_sources():
     
     # Load existing feeds
     existing_feeds_file = get_env('EXISTING_FEEDS_FILE', 'existing_architectural_feeds.json')
-    existing_feeds = []
-    
-    try:
-        if os.path.exists(existing_feeds_file):
-            with open(existing_feeds_file, 'r') as f:
-                existing_feeds = json.load(f)
-    except Exception as e:
-        log.warning(f"⚠️ Could not load existing feeds: {e}")
+    existing_feeds = load_existing_feeds(existing_feeds_file)
     
     # Group by category
-    categories = {}
+    categories = defaultdict(list)
     for feed in existing_feeds:
-        category = feed.get('category', 'Additional')
-        if category not in categories:
-            categories[category] = []
-        categories[category].append(feed)
+        categories[feed.get('category', 'Additional')].append(feed)
     
     # Display sources by category
     total_sources = len(existing_feeds)
@@ -842,57 +1113,8 @@ def display_architectural_sources():
         for feed in feeds:
             log.info(f"   • {feed['name']}")
     
-    # Show next source to be added
-    architectural_sources = [
-        # Academic & Research Institutions
-        {"name": "AA School of Architecture", "url": "https://www.aaschool.ac.uk/feed", "category": "Academic"},
-        {"name": "Berlage Institute", "url": "https://theberlage.nl/feed", "category": "Academic"},
-        {"name": "ETH Zurich Architecture", "url": "https://arch.ethz.ch/feed", "category": "Academic"},
-        {"name": "TU Delft Architecture", "url": "https://www.tudelft.nl/en/architecture-and-the-built-environment/feed", "category": "Academic"},
-        {"name": "UCL Bartlett", "url": "https://www.ucl.ac.uk/bartlett/feed", "category": "Academic"},
-        {"name": "Cornell Architecture", "url": "https://aap.cornell.edu/feed", "category": "Academic"},
-        {"name": "Princeton Architecture", "url": "https://soa.princeton.edu/feed", "category": "Academic"},
-        {"name": "UC Berkeley Architecture", "url": "https://ced.berkeley.edu/architecture/feed", "category": "Academic"},
-        
-        # International Publications
-        {"name": "Architectural Review Asia Pacific", "url": "https://www.architectural-review.com/feed", "category": "International"},
-        {"name": "Architecture Australia", "url": "https://architectureau.com/feed", "category": "International"},
-        {"name": "Canadian Architect", "url": "https://www.canadianarchitect.com/feed", "category": "International"},
-        {"name": "Architectural Digest India", "url": "https://www.architecturaldigest.in/feed", "category": "International"},
-        {"name": "Architectural Digest Middle East", "url": "https://www.architecturaldigestme.com/feed", "category": "International"},
-        {"name": "Architectural Digest China", "url": "https://www.architecturaldigest.cn/feed", "category": "International"},
-        
-        # Specialized Research
-        {"name": "Architectural Science Review", "url": "https://www.tandfonline.com/feed/rss/rjar20", "category": "Research"},
-        {"name": "Journal of Architectural Education", "url": "https://www.tandfonline.com/feed/rss/rjae20", "category": "Research"},
-        {"name": "Architecture Research Quarterly", "url": "https://www.cambridge.org/core/journals/architecture-research-quarterly/feed", "category": "Research"},
-        {"name": "International Journal of Architectural Computing", "url": "https://journals.sagepub.com/feed/ijac", "category": "Research"},
-        
-        # Innovation & Technology
-        {"name": "Archinect", "url": "https://archinect.com/feed", "category": "Innovation"},
-        {"name": "Architizer", "url": "https://architizer.com/feed", "category": "Innovation"},
-        {"name": "Architecture Lab", "url": "https://www.architecturelab.net/feed", "category": "Innovation"},
-        {"name": "Architecture Now", "url": "https://architecturenow.co.nz/feed", "category": "Innovation"},
-        {"name": "Architecture & Design", "url": "https://www.architectureanddesign.com.au/feed", "category": "Innovation"},
-        
-        # Regional & Cultural
-        {"name": "Architectural Record", "url": "https://www.architecturalrecord.com/rss.xml", "category": "Regional"},
-        {"name": "Architect Magazine", "url": "https://www.architectmagazine.com/rss", "category": "Regional"},
-        {"name": "Architectural Digest", "url": "https://www.architecturaldigest.com/rss", "category": "Regional"},
-        {"name": "Architecture Week", "url": "https://www.architectureweek.com/feed", "category": "Regional"},
-        
-        # Emerging & Alternative
-        {"name": "Architecture Foundation", "url": "https://architecturefoundation.org.uk/feed", "category": "Emerging"},
-        {"name": "Architectural League", "url": "https://archleague.org/feed", "category": "Emerging"},
-        {"name": "Storefront for Art and Architecture", "url": "https://storefrontnews.org/feed", "category": "Emerging"},
-        {"name": "Architecture for Humanity", "url": "https://architectureforhumanity.org/feed", "category": "Emerging"},
-        
-        # Digital & Computational
-        {"name": "Digital Architecture", "url": "https://digitalarchitecture.org/feed", "category": "Digital"},
-        {"name": "Computational Architecture", "url": "https://computationalarchitecture.net/feed", "category": "Digital"},
-        {"name": "Parametric Architecture", "url": "https://parametric-architecture.com/feed", "category": "Digital"},
-        {"name": "Architecture and Computation", "url": "https://architectureandcomputation.com/feed", "category": "Digital"}
-    ]
+    # Show next source to be added (display only, so no fallback warning)
+    architectural_sources = get_architectural_sources(warn_on_fallback=False)
     
     today = datetime.now().date()
     day_of_year = today.timetuple().tm_yday
@@ -913,8 +1135,7 @@ def add_manual_source(name, url, category):
     # Check if source already exists
     try:
         if os.path.exists(manual_sources_file):
-            with open(manual_sources_file, 'r', encoding='utf-8') as f:
-                existing_lines = f.readlines()
+            existing_lines = Path(manual_sources_file).read_text(encoding='utf-8').splitlines()
             
             for line in existing_lines:
                 line = line.strip()
@@ -982,6 +1203,64 @@ def remove_manual_source(name):
         log.error(f"❌ Error removing source: {e}")
         return False
 
+def add_sources(sources):
+    """Add many sources to the existing feeds file with one load and one save.
+    
+    Returns the number of sources added, or None if the feeds file could not be saved.
+    """
+    existing_feeds_file = get_env('EXISTING_FEEDS_FILE', 'existing_architectural_feeds.json')
+    
+    # Load existing feeds
+    existing_feeds = load_existing_feeds(existing_feeds_file)
+    
+    # Get existing source names
+    existing_names = {feed.get('name') for feed in existing_feeds}
+    
+    added_count = 0
+    skipped_count = 0
+    invalid_count = 0
+    added_at = datetime.now().isoformat()
+    for source in sources:
+        # Every source needs a non-empty name and url
+        if not (isinstance(source, dict) and source.get('name') and source.get('url')):
+            invalid_count += 1
+            log.warning(f"⚠️ Skipped invalid source (needs non-empty name and url): {source!r}")
+            continue
+        name = source.get('name')
+        category = source.get('category', 'Additional')
+        
+        # Check if already exists
+        if name not in existing_names:
+            existing_feeds.append({
+                "name": name,
+                "url": source.get('url'),
+                "category": category,
+                "added_at": added_at
+            })
+            existing_names.add(name)
+            added_count += 1
+            log.debug("✅ Added: %s (%s)", name, category)
+        else:
+            skipped_count += 1
+            log.debug("⏭️ Skipped (already exists): %s", name)
+    
+    if skipped_count:
+        log.info(f"⏭️ Skipped {skipped_count} sources that already exist")
+    if invalid_count:
+        log.warning(f"⚠️ Skipped {invalid_count} invalid sources")
+    
+    # Nothing new, leave the feeds file untouched
+    if not added_count:
+        return 0
+    
+    # Save updated feeds
+    try:
+        save_existing_feeds(existing_feeds_file, existing_feeds)
+    except Exception as e:
+        log.error(f"❌ Error saving feeds: {e}")
+        return None
+    return added_count
+
 def add_batch_manual_sources():
     """Add a batch of predefined sources from the text file"""
     log.info("🔧 Adding batch of predefined sources from text file...")
@@ -993,74 +1272,113 @@ def add_batch_manual_sources():
         return False
     
     try:
-        with open(manual_sources_file, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-        
-        added_count = 0
-        existing_feeds_file = get_env('EXISTING_FEEDS_FILE', 'existing_architectural_feeds.json')
-        existing_feeds = []
-        
-        # Load existing feeds
-        try:
-            if os.path.exists(existing_feeds_file):
-                with open(existing_feeds_file, 'r') as f:
-                    existing_feeds = json.load(f)
-        except Exception as e:
-            log.warning(f"⚠️ Could not load existing feeds: {e}")
-        
-        # Get existing source names
-        existing_names = {feed.get('name') for feed in existing_feeds}
+        lines = Path(manual_sources_file).read_text(encoding='utf-8').splitlines()
         
+        sources = []
         for line in lines:
             line = line.strip()
             if line and not line.startswith('#') and '|' in line:
                 parts = line.split('|')
                 if len(parts) >= 3:
-                    name = parts[0].strip()
-                    url = parts[1].strip()
-                    category = parts[2].strip()
-                    
-                    # Check if already exists
-                    if name not in existing_names:
-                        new_source = {
-                            "name": name,
-                            "url": url,
-                            "category": category,
-                            "added_at": datetime.now().isoformat()
-                        }
-                        existing_feeds.append(new_source)
-                        existing_names.add(name)
-                        added_count += 1
-                        log.info(f"✅ Added: {name} ({category})")
-                    else:
-                        log.info(f"⏭️ Skipped (already exists): {name}")
+                    sources.append({
+                        "name": parts[0].strip(),
+                        "url": parts[1].strip(),
+                        "category": parts[2].strip()
+                    })
         
-        # Save updated feeds
-        try:
-            with open(existing_feeds_file, 'w') as f:
-                json.dump(existing_feeds, f, indent=2)
-            log.info(f"🎉 Successfully added {added_count} new sources from text file")
-            return True
-        except Exception as e:
-            log.error(f"❌ Error saving feeds: {e}")
+        added_count = add_sources(sources)
+        if added_count is None:
             return False
+        log.info(f"🎉 Successfully added {added_count} new sources from text file")
+        return True
             
     except Exception as e:
         log.error(f"❌ Error reading manual sources file: {e}")
         return False
 
+def add_sources_from_file(sources_file):
+    """Bulk-add sources from a JSON file holding a list of {name, url, category} objects"""
+    log.info(f"🔧 Adding sources from {sources_file}...")
+    
+    try:
+        with open(sources_file, 'rb') as f:
+            sources = load_json_bytes(f.read())
+    except Exception as e:
+        log.error(f"❌ Error reading sources file: {e}")
+        return False
+    
+    if not isinstance(sources, list):
+        log.error(f"❌ Sources file must contain a JSON list of {{name, url, category}} objects, got {type(sources).__name__}")
+        return False
+    
+    added_count = add_sources(sources)
+    if added_count is None:
+        return False
+    log.info(f"🎉 Successfully added {added_count} new sources from {sources_file}")
+    return True
+
 # === 🤖 LLM Integration ===
+# Shared keep-alive session for every API call, so concurrent workers reuse pooled TLS connections
+# (status-code retries stay in the per-call loops, which log and back off per status code; the adapter
+# only retries failed connects quickly, before a request was sent)
+HTTP_SESSION = requests.Session()
+
+def mount_http_adapter():
+    """(Re)size the session's connection pool to the current image and caption concurrency"""
+    # Image and caption workers run at the same time and may hit the same host
+    pool_size = max(MAX_CONCURRENT_IMAGES + MAX_CONCURRENT_CAPTIONS, 10)
+    HTTP_SESSION.mount('https://', requests.adapters.HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size,
+        max_retries=Retry(total=None, connect=2, read=0, status=0, other=0, backoff_factor=0.5)))
+
+mount_http_adapter()
+
+# Prompt token totals across LLM calls, to check how often the provider's prefix cache is hit
+LLM_USAGE_STATS = {'calls': 0, 'prompt_tokens': 0, 'cached_tokens': 0}
+_LLM_USAGE_LOCK = threading.Lock()
+
+def record_llm_usage(data):
+    """Add one response's prompt and cached token counts to LLM_USAGE_STATS"""
+    usage = data.get('usage') or {}
+    # OpenAI-style responses report cached_tokens under prompt_tokens_details, Groq also under x_groq.usage
+    cached = (usage.get('prompt_tokens_details') or {}).get('cached_tokens')
+    if cached is None:
+        cached = ((data.get('x_groq') or {}).get('usage') or {}).get('cached_tokens', 0)
+    with _LLM_USAGE_LOCK:
+        LLM_USAGE_STATS['calls'] += 1
+        LLM_USAGE_STATS['prompt_tokens'] += usage.get('prompt_tokens') or 0
+        LLM_USAGE_STATS['cached_tokens'] += cached or 0
+
+def log_llm_usage_summary():
+    """Log the prompt cache hit rate for the LLM calls made in this run"""
+    prompt_tokens = LLM_USAGE_STATS['prompt_tokens']
+    if not prompt_tokens:
+        return
+    cache_hit_rate = LLM_USAGE_STATS['cached_tokens'] / prompt_tokens * 100
+    log.info(f"🧮 LLM prompt tokens: {prompt_tokens} over {LLM_USAGE_STATS['calls']} calls, "
+             f"{LLM_USAGE_STATS['cached_tokens']} cached ({cache_hit_rate:.1f}% cache hit rate)")
+
+def get_retry_delay(response, retry_delays, attempt):
+    """Use the server's Retry-After header when present, otherwise the configured delay plus jitter, capped at RETRY_MAX_DELAY"""
+    retry_after = response.headers.get('Retry-After') if response is not None else None
+    if retry_after:
+        try:
+            return min(RETRY_MAX_DELAY, max(1.0, float(retry_after)))
+        except ValueError:
+            try:
+                retry_at = parsedate_to_datetime(retry_after)
+                return min(RETRY_MAX_DELAY, max(1.0, round(retry_at.timestamp() - time.time(), 1)))
+            except (TypeError, ValueError):
+                pass
+    
+    # Follow the configured schedule, doubling the last delay for attempts beyond it
+    delay = retry_delays[min(attempt, len(retry_delays)-1)] * 2 ** max(0, attempt - len(retry_delays) + 1)
+    # Jitter on top of the full delay keeps concurrent workers from retrying in lockstep
+    delay += random.uniform(0, delay * RETRY_JITTER)
+    return round(min(RETRY_MAX_DELAY, delay), 1)
+
 def call_llm(prompt, system_prompt=None):
     """Call LLM API with caching, enhanced token limits for sophisticated prompts"""
-    # Create cache key
-    cache_key = f"llm_{TEXT_PROVIDER}_{hashlib.md5((prompt + str(system_prompt)).encode()).hexdigest()}"
-    
-    # Try to load from cache first
-    cached_result = load_from_cache(cache_key, max_age_hours=12)
-    if cached_result:
-        log.debug(f"📦 Using cached LLM result for prompt: {prompt[:50]}...")
-        return cached_result
-    
     if TEXT_PROVIDER == 'groq':
         url = get_env('GROQ_API_URL', 'https://api.groq.com/openai/v1/chat/completions')
         api_key = GROQ_API_KEY
@@ -1073,6 +1391,18 @@ def call_llm(prompt, system_prompt=None):
             model = 'meta-llama/Llama-3.3-70B-Instruct-Turbo-Free'
         else:
             model = TEXT_MODEL
+    temperature = 0.8
+    
+    # Create cache key from everything that shapes the response
+    request_key = dump_json_bytes({'provider': TEXT_PROVIDER, 'model': model, 'system': system_prompt,
+                                   'prompt': prompt, 'temperature': temperature})
+    cache_key = f"llm_{hashlib.blake2b(request_key, digest_size=16).hexdigest()}"
+    
+    # Try to load from cache first
+    cached_result = load_from_cache(cache_key, max_age_hours=12)
+    if cached_result:
+        log.debug("📦 Using cached LLM result for prompt: %.50s...", prompt)
+        return cached_result
     
     messages = []
     if system_prompt:
@@ -1083,7 +1413,7 @@ def call_llm(prompt, system_prompt=None):
         "model": model,
         "messages": messages,
         "max_tokens": 4000,  # Enhanced from 2000 to 4000 for sophisticated responses
-        "temperature": 0.8
+        "temperature": temperature
     }
     
     headers = {
@@ -1091,15 +1421,19 @@ def call_llm(prompt, system_prompt=None):
         "Content-Type": "application/json"
     }
     
-    max_retries = int(get_env('LLM_MAX_RETRIES', '3'))
-    retry_delays = [int(x.strip()) for x in get_env('LLM_RETRY_DELAYS', '60,120,180').split(',')]
+    # Serialize once, retries resend the same bytes
+    body = dump_json_bytes(payload)
+    
+    max_retries = LLM_MAX_RETRIES
+    retry_delays = LLM_RETRY_DELAYS
     
     for attempt in range(max_retries):
         try:
-            response = requests.post(url, headers=headers, json=payload, timeout=120)
+            response = HTTP_SESSION.post(url, headers=headers, data=body, timeout=120)
             response.raise_for_status()
-            data = response.json()
+            data = load_json_bytes(response.content)
             result = data['choices'][0]['message']['content'].strip()
+            record_llm_usage(data)
             
             # Save to cache for future use
             save_to_cache(cache_key, result)
@@ -1109,17 +1443,17 @@ def call_llm(prompt, system_prompt=None):
             
         except requests.exceptions.HTTPError as e:
             if e.response.status_code == 429:  # Rate limited
-                delay = retry_delays[min(attempt, len(retry_delays)-1)]
+                delay = get_retry_delay(e.response, retry_delays, attempt)
                 log.warning(f"⚠️ Rate limited (attempt {attempt+1}/{max_retries}), waiting {delay}s...")
                 time.sleep(delay)
                 continue
             elif e.response.status_code == 503:  # Service unavailable
-                delay = retry_delays[min(attempt, len(retry_delays)-1)]
+                delay = get_retry_delay(e.response, retry_delays, attempt)
                 log.warning(f"⚠️ Service unavailable (attempt {attempt+1}/{max_retries}), waiting {delay}s...")
                 time.sleep(delay)
                 continue
             elif e.response.status_code == 502:  # Bad gateway
-                delay = retry_delays[min(attempt, len(retry_delays)-1)]
+                delay = get_retry_delay(e.response, retry_delays, attempt)
                 log.warning(f"⚠️ Bad gateway (attempt {attempt+1}/{max_retries}), waiting {delay}s...")
                 time.sleep(delay)
                 continue
@@ -1134,7 +1468,7 @@ def call_llm(prompt, system_prompt=None):
             if attempt == max_retries - 1:
                 log.error("❌ All retry attempts failed due to timeout")
                 return None
-            time.sleep(retry_delays[min(attempt, len(retry_delays)-1)])
+            time.sleep(get_retry_delay(None, retry_delays, attempt))
             continue
             
         except requests.exceptions.ConnectionError:
@@ -1142,14 +1476,14 @@ def call_llm(prompt, system_prompt=None):
             if attempt == max_retries - 1:
                 log.error("❌ All retry attempts failed due to connection error")
                 return None
-            time.sleep(retry_delays[min(attempt, len(retry_delays)-1)])
+            time.sleep(get_retry_delay(None, retry_delays, attempt))
             continue
             
-        except Exception as e:
-            log.error(f"❌ Unexpected error (attempt {attempt+1}/{max_retries}): {e}")
+        except Exception:
+            log.exception(f"❌ Unexpected error (attempt {attempt+1}/{max_retries})")
             if attempt == max_retries - 1:
                 return None
-            time.sleep(retry_delays[min(attempt, len(retry_delays)-1)])
+            time.sleep(get_retry_delay(None, retry_delays, attempt))
             continue
     
     log.error("❌ All retry attempts failed")
@@ -1171,47 +1505,68 @@ def generate_prompts(theme, num_prompts=50):
         log.error("❌ Failed to generate prompts")
         return []
 
-def calculate_similarity_score(caption1, caption2):
-    """Calculate similarity score between two captions"""
-    # Convert to lowercase and split into words
-    words1 = set(caption1.lower().replace('\n', ' ').split())
-    words2 = set(caption2.lower().replace('\n', ' ').split())
-    
-    # Remove common stop words
-    stop_words = {
-        'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by',
-        'is', 'are', 'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did',
-        'will', 'would', 'could', 'should', 'may', 'might', 'can', 'must', 'shall', 'this', 'that',
-        'these', 'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they', 'me', 'him', 'her', 'us', 'them',
-        'my', 'your', 'his', 'her', 'its', 'our', 'their', 'mine', 'yours', 'his', 'hers', 'ours', 'theirs'
-    }
-    
-    words1 = words1 - stop_words
-    words2 = words2 - stop_words
-    
+# Common stop words ignored when comparing captions, built once for every similarity check
+_STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by',
+    'is', 'are', 'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did',
+    'will', 'would', 'could', 'should', 'may', 'might', 'can', 'must', 'shall', 'this', 'that',
+    'these', 'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they', 'me', 'him', 'her', 'us', 'them',
+    'my', 'your', 'his', 'its', 'our', 'their', 'mine', 'yours', 'hers', 'ours', 'theirs'
+})
+_WORD_RE = re.compile(r"[a-z']+")
+
+# Accepted captions are compared against every later candidate, so their word sets are memoised
+@lru_cache(maxsize=1024)
+def caption_words(caption):
+    """Lowercased content words of a caption, with stop words removed"""
+    # A single regex pass splits on newlines and drops punctuation stuck to words
+    return frozenset(_WORD_RE.findall(caption.lower())) - _STOP_WORDS
+
+def jaccard_similarity(words1, words2):
+    """Jaccard similarity of two word sets, 0.0 when either is empty"""
     if not words1 or not words2:
         return 0.0
     
-    # Calculate Jaccard similarity
     intersection = len(words1.intersection(words2))
     union = len(words1.union(words2))
     
     return intersection / union if union > 0 else 0.0
 
+def calculate_similarity_score(caption1, caption2):
+    """Calculate similarity score between two captions"""
+    return jaccard_similarity(caption_words(caption1), caption_words(caption2))
+
 def is_caption_unique(new_caption, existing_captions, similarity_threshold=None):
     if similarity_threshold is None:
-        similarity_threshold = float(get_env('CAPTION_SIMILARITY_THRESHOLD', '0.3'))
+        similarity_threshold = CAPTION_SIMILARITY_THRESHOLD
     """Check if a new caption is unique compared to existing captions"""
+    # Tokenize the candidate once rather than again for every existing caption
+    new_words = caption_words(new_caption)
     for existing_caption in existing_captions:
-        similarity = calculate_similarity_score(new_caption, existing_caption)
+        similarity = jaccard_similarity(new_words, caption_words(existing_caption))
         if similarity > similarity_threshold:
             log.info(f"⚠️ Caption similarity detected: {similarity:.2f}")
             return False
     return True
 
+# Fallback captions used when every generation attempt fails or is too similar
+FALLBACK_CAPTIONS = [
+    "Silent spaces whisper architectural secrets\nForm emerges from functional necessity\nLight sculpts geometric boundaries\nHuman scale defines monumental vision\nMaterials narrate stories of creation\nSpace transforms into poetic motion",
+    "Architectural dreams materialize in concrete\nFunction follows form in perfect balance\nShadows dance across structural surfaces\nMonumental vision meets human intimacy\nCreation stories etched in materials\nPoetry flows through spatial boundaries",
+    "Concrete dreams take architectural form\nBalance achieved through functional harmony\nSurfaces reflect structural light patterns\nIntimate spaces within monumental scale\nMaterials bear witness to creation\nBoundaries dissolve into spatial poetry",
+    "Architectural visions crystallize in space\nHarmony emerges from functional design\nLight patterns illuminate structural forms\nScale balances monumentality with intimacy\nCreation narratives embedded in materials\nPoetry manifests through spatial design",
+    "Space becomes architectural reality\nDesign harmonizes function with beauty\nForms emerge from light and shadow\nIntimacy coexists with grandeur\nMaterials speak of creative vision\nSpatial poetry transcends boundaries"
+]
+
+# Model preamble and echoed instructions that must not end up as caption lines, matched in one pass
+_AI_PREAMBLE_RE = re.compile(
+    r"here is a|caption that meets|requirements|ai generated|artificial intelligence|generated by|"
+    r"created by ai|architectural analysis|poetic approach|write the|caption now",
+    re.IGNORECASE)
+
 def generate_unique_caption(prompt, existing_captions, max_attempts=None):
     if max_attempts is None:
-        max_attempts = int(get_env('CAPTION_MAX_ATTEMPTS', '5'))
+        max_attempts = CAPTION_MAX_ATTEMPTS
     """Generate a unique caption that doesn't repeat content from existing captions"""
     log.info(f"📝 Generating unique caption for: {prompt[:50]}...")
     
@@ -1224,15 +1579,11 @@ def generate_unique_caption(prompt, existing_captions, max_attempts=None):
             lines = []
             for line in response.split('\n'):
                 line = line.strip()
-                if line and not any(ai_text in line.lower() for ai_text in [
-                    "here is a", "caption that meets", "requirements:", "ai generated", 
-                    "artificial intelligence", "generated by", "created by ai", "architectural analysis",
-                    "poetic approach", "requirements", "write the", "caption now"
-                ]):
+                if line and not _AI_PREAMBLE_RE.search(line):
                     lines.append(line)
             
             # Ensure exactly configured number of lines
-            caption_line_count = int(get_env('CAPTION_LINE_COUNT', '6'))
+            caption_line_count = CAPTION_LINE_COUNT
             if len(lines) >= caption_line_count:
                 result = '\n'.join(lines[:caption_line_count])
             else:
@@ -1254,45 +1605,39 @@ def generate_unique_caption(prompt, existing_captions, max_attempts=None):
     
     # If all attempts failed, generate a completely different fallback
     log.warning("⚠️ Using unique fallback caption")
-    fallback_captions = [
-        "Silent spaces whisper architectural secrets\nForm emerges from functional necessity\nLight sculpts geometric boundaries\nHuman scale defines monumental vision\nMaterials narrate stories of creation\nSpace transforms into poetic motion",
-        "Architectural dreams materialize in concrete\nFunction follows form in perfect balance\nShadows dance across structural surfaces\nMonumental vision meets human intimacy\nCreation stories etched in materials\nPoetry flows through spatial boundaries",
-        "Concrete dreams take architectural form\nBalance achieved through functional harmony\nSurfaces reflect structural light patterns\nIntimate spaces within monumental scale\nMaterials bear witness to creation\nBoundaries dissolve into spatial poetry",
-        "Architectural visions crystallize in space\nHarmony emerges from functional design\nLight patterns illuminate structural forms\nScale balances monumentality with intimacy\nCreation narratives embedded in materials\nPoetry manifests through spatial design",
-        "Space becomes architectural reality\nDesign harmonizes function with beauty\nForms emerge from light and shadow\nIntimacy coexists with grandeur\nMaterials speak of creative vision\nSpatial poetry transcends boundaries"
-    ]
     
     # Choose a fallback that's different from existing captions
-    for fallback in fallback_captions:
+    for fallback in FALLBACK_CAPTIONS:
         if is_caption_unique(fallback, existing_captions):
             return fallback
     
     # If all fallbacks are similar, modify one slightly
-    return fallback_captions[0].replace("Architectural", "Structural").replace("spaces", "volumes")
+    return FALLBACK_CAPTIONS[0].replace("Architectural", "Structural").replace("spaces", "volumes")
 
 def generate_caption(prompt):
     """Legacy function - now calls generate_unique_caption with empty existing_captions"""
     return generate_unique_caption(prompt, [])
 
 # === 🖼️ Image Generation ===
-def generate_single_image(prompt, style_name, image_number):
+def generate_single_image(prompt, style_name, image_number, style_dir=None, timestamp=None):
     """Generate a single image using Together.ai API"""
     log.info(f"🎨 Generating {style_name} image {image_number}")
     
-    style_dir = os.path.join("images", style_name)
-    os.makedirs(style_dir, exist_ok=True)
+    # generate_all_images creates the directory and run timestamp once for the whole batch
+    if style_dir is None:
+        style_dir = os.path.join("images", style_name)
+        os.makedirs(style_dir, exist_ok=True)
     
     # Get enhanced style configuration with sophisticated prompts
-    style_config = STYLE_CONFIG.get(style_name, {
-        'model': 'black-forest-labs/FLUX.1-schnell-free',  # Use free model as default
-        'prompt_suffix': f', {style_name} architectural style, sophisticated design, artistic composition, professional photography, high quality, detailed materials, perfect lighting, architectural beauty, structural elegance, spatial harmony, material expression, environmental integration, human scale consideration, cultural significance, technical precision, aesthetic excellence',
-        'negative_prompt': 'blurry, low quality, distorted, amateur, unrealistic, poor composition, bad lighting, ugly, disorganized, messy, unprofessional, cartoon, painting, sketch, drawing, text, watermark, signature'
-    })
+    style_config = STYLE_CONFIG.get(style_name)
+    if style_config is None:
+        style_config = dict(DEFAULT_STYLE_CONFIG,
+                            prompt_suffix=DEFAULT_STYLE_CONFIG['prompt_suffix'].format(style_name=style_name))
     
     full_prompt = f"{prompt}{style_config['prompt_suffix']}"
     negative_prompt = style_config['negative_prompt']
     
-    together_api_url = get_env('TOGETHER_API_URL', 'https://api.together.xyz/v1/images/generations')
+    together_api_url = TOGETHER_API_URL
     
     payload = {
         "model": style_config['model'],
@@ -1310,56 +1655,73 @@ def generate_single_image(prompt, style_name, image_number):
         "Content-Type": "application/json"
     }
     
-    max_retries = int(get_env('IMAGE_MAX_RETRIES', '3'))
-    retry_delays = [int(x.strip()) for x in get_env('IMAGE_RETRY_DELAYS', '60,120,180').split(',')]
+    # Serialize once, retries resend the same bytes
+    body = dump_json_bytes(payload)
+    
+    max_retries = IMAGE_MAX_RETRIES
+    retry_delays = IMAGE_RETRY_DELAYS
     
     for attempt in range(max_retries):
         try:
             log.info(f"🔄 Attempt {attempt + 1}/{max_retries} for {style_name} image {image_number}")
             
-            response = requests.post(
+            response = HTTP_SESSION.post(
                 together_api_url,
                 headers=headers,
-                json=payload,
+                data=body,
                 timeout=120
             )
             
             if response.status_code == 200:
-                data = response.json()
+                data = load_json_bytes(response.content)
                 if 'data' in data and len(data['data']) > 0:
                     image_data = data['data'][0]
                     if 'url' in image_data:
                         image_url = image_data['url']
-                        image_response = requests.get(image_url, timeout=60)
-                        if image_response.status_code == 200:
-                            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                            image_filename = f"{timestamp}_{image_number:02d}_{style_name}.jpg"
-                            image_path = os.path.join(style_dir, image_filename)
-                            
-                            with open(image_path, 'wb') as f:
-                                f.write(image_response.content)
-                            
-                            log.info(f"✅ Generated {style_name} image {image_number}: {image_filename}")
-                            time.sleep(3)  # Increased rate limiting after successful image generation
-                            return image_path
-                        else:
-                            log.error(f"❌ Failed to download image from {image_url} (HTTP {image_response.status_code})")
+                        # Stream the download to disk in chunks rather than buffering the whole JPEG
+                        with HTTP_SESSION.get(image_url, stream=True, timeout=60) as image_response:
+                            if image_response.status_code == 200:
+                                if timestamp is None:
+                                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                                image_filename = f"{timestamp}_{image_number:02d}_{style_name}.jpg"
+                                image_path = os.path.join(style_dir, image_filename)
+                                
+                                # Write to a partial file first so an interrupted download is never picked up as an image
+                                part_path = f"{image_path}.part"
+                                image_response.raw.decode_content = True
+                                try:
+                                    with open(part_path, 'wb') as f:
+                                        shutil.copyfileobj(image_response.raw, f, length=65536)
+                                    os.replace(part_path, image_path)
+                                except Exception:
+                                    # Don't leave a partial download behind for each failed attempt
+                                    try:
+                                        os.unlink(part_path)
+                                    except OSError:
+                                        pass
+                                    raise
+                                
+                                log.info(f"✅ Generated {style_name} image {image_number}: {image_filename}")
+                                time.sleep(3)  # Increased rate limiting after successful image generation
+                                return image_path
+                            else:
+                                log.error(f"❌ Failed to download image from {image_url} (HTTP {image_response.status_code})")
                     else:
                         log.error(f"❌ No image URL in response for {style_name} image {image_number}")
                 else:
                     log.error(f"❌ Invalid response structure for {style_name} image {image_number}")
             elif response.status_code == 429:  # Rate limited
-                delay = retry_delays[min(attempt, len(retry_delays)-1)]
+                delay = get_retry_delay(response, retry_delays, attempt)
                 log.warning(f"⚠️ Rate limited (attempt {attempt+1}/{max_retries}), waiting {delay}s...")
                 time.sleep(delay)
                 continue
             elif response.status_code == 503:  # Service unavailable
-                delay = retry_delays[min(attempt, len(retry_delays)-1)]
+                delay = get_retry_delay(response, retry_delays, attempt)
                 log.warning(f"⚠️ Service unavailable (attempt {attempt+1}/{max_retries}), waiting {delay}s...")
                 time.sleep(delay)
                 continue
             elif response.status_code == 502:  # Bad gateway
-                delay = retry_delays[min(attempt, len(retry_delays)-1)]
+                delay = get_retry_delay(response, retry_delays, attempt)
                 log.warning(f"⚠️ Bad gateway (attempt {attempt+1}/{max_retries}), waiting {delay}s...")
                 time.sleep(delay)
                 continue
@@ -1367,7 +1729,7 @@ def generate_single_image(prompt, style_name, image_number):
                 log.error(f"❌ Image generation failed with HTTP {response.status_code}")
                 if attempt == max_retries - 1:
                     return None
-                time.sleep(retry_delays[min(attempt, len(retry_delays)-1)])
+                time.sleep(get_retry_delay(None, retry_delays, attempt))
                 continue
                 
         except requests.exceptions.Timeout:
@@ -1375,7 +1737,7 @@ def generate_single_image(prompt, style_name, image_number):
             if attempt == max_retries - 1:
                 log.error("❌ All image generation attempts failed due to timeout")
                 return None
-            time.sleep(retry_delays[min(attempt, len(retry_delays)-1)])
+            time.sleep(get_retry_delay(None, retry_delays, attempt))
             continue
             
         except requests.exceptions.ConnectionError:
@@ -1383,14 +1745,14 @@ def generate_single_image(prompt, style_name, image_number):
             if attempt == max_retries - 1:
                 log.error("❌ All image generation attempts failed due to connection error")
                 return None
-            time.sleep(retry_delays[min(attempt, len(retry_delays)-1)])
+            time.sleep(get_retry_delay(None, retry_delays, attempt))
             continue
             
-        except Exception as e:
-            log.error(f"❌ Unexpected image generation error (attempt {attempt+1}/{max_retries}): {e}")
+        except Exception:
+            log.exception(f"❌ Unexpected image generation error (attempt {attempt+1}/{max_retries})")
             if attempt == max_retries - 1:
                 return None
-            time.sleep(retry_delays[min(attempt, len(retry_delays)-1)])
+            time.sleep(get_retry_delay(None, retry_delays, attempt))
             continue
     
     log.error(f"❌ All image generation attempts failed for {style_name} image {image_number}")
@@ -1400,27 +1762,29 @@ def generate_all_images(prompts, style_name):
     """Generate all images with batch processing and concurrent execution for 100x speed"""
     log.info(f"🎨 Starting batch concurrent generation of {len(prompts)} images for {style_name} style")
     
-    images = []
-    max_workers = MAX_CONCURRENT_IMAGES if not FAST_MODE else 1
+    images = [None] * len(prompts)  # Pre-allocate so results keep prompt order
+    max_workers = MAX_CONCURRENT_IMAGES
     
     # Pre-create style directory for all images
-    style_dir = Path("images") / style_name
-    style_dir.mkdir(parents=True, exist_ok=True)
+    style_dir = os.path.join("images", style_name)
+    os.makedirs(style_dir, exist_ok=True)
+    
+    # One timestamp for the whole run instead of formatting the clock per image
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     
     def generate_image_with_index(args):
         i, prompt = args
         try:
             # Check if image already exists (for resume functionality)
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             image_filename = f"{timestamp}_{i+1:02d}_{style_name}.jpg"
-            image_path = style_dir / image_filename
+            image_path = os.path.join(style_dir, image_filename)
             
             # Skip if already exists and we're in fast mode
-            if image_path.exists() and FAST_MODE:
-                log.debug(f"📦 Using existing image: {image_filename}")
-                return i, str(image_path), None
+            if FAST_MODE and os.path.exists(image_path):
+                log.debug("📦 Using existing image: %s", image_filename)
+                return i, image_path, None
             
-            result_path = generate_single_image(prompt, style_name, i+1)
+            result_path = generate_single_image(prompt, style_name, i+1, style_dir, timestamp)
             return i, result_path, None
         except Exception as e:
             return i, None, str(e)
@@ -1445,7 +1809,7 @@ def generate_all_images(prompts, style_name):
                     i, image_path, error = future.result()
                     
                     if image_path:
-                        images.append(image_path)
+                        images[i] = image_path
                         pbar.set_postfix_str(f"✅ {os.path.basename(image_path)}")
                     else:
                         log.warning(f"⚠️ Failed to generate image {i+1}: {error}")
@@ -1457,18 +1821,100 @@ def generate_all_images(prompts, style_name):
             if OPTIMIZE_MEMORY:
                 gc.collect()
     
-    success_rate = (len(images) / len(prompts)) * 100
-    log.info(f"🎉 Batch image generation complete: {len(images)}/{len(prompts)} images generated ({success_rate:.1f}% success rate)")
+    # Failed images stay as None so the list lines up with the prompts (and their captions)
+    generated_count = sum(image is not None for image in images)
+    success_rate = (generated_count / len(prompts)) * 100
+    log.info(f"🎉 Batch image generation complete: {generated_count}/{len(prompts)} images generated ({success_rate:.1f}% success rate)")
     
     return images
 
 # === 📝 Caption Generation ===
-def generate_all_captions(prompts):
-    """Generate captions with caching and concurrent processing for 100x speed"""
+# Echoed "IMAGE n:" headers in a batched caption response; real caption lines may still start with "Image"
+_IMAGE_HEADER_RE = re.compile(r'^IMAGE \d+:')
+
+def generate_captions_batched(prompts):
+    """Caption several prompts with a single LLM call, returning None for any caption that could not be parsed"""
+    # Each item is the regular single-caption request, so batching keeps CAPTION_TEMPLATE's rules
+    numbered_requests = "\n\n".join(f"IMAGE {i + 1}: {CAPTION_TEMPLATE.format(prompt=prompt)}"
+                                      for i, prompt in enumerate(prompts))
+    batch_prompt = (f"Answer each of the {len(prompts)} caption requests below. "
+                    f"Output only the captions, in the same order, separated by a line containing only ---.\n\n"
+                    f"{numbered_requests}")
+    
+    captions = [None] * len(prompts)
+    response = call_llm(batch_prompt, CAPTION_SYSTEM)
+    if not response:
+        return captions
+    
+    # Split on separator lines, dropping any echoed "IMAGE n:" headers
+    blocks = [[]]
+    for line in response.split('\n'):
+        line = line.strip()
+        if line == '---':
+            blocks.append([])
+        elif line and not _IMAGE_HEADER_RE.match(line):
+            blocks[-1].append(line)
+    blocks = [block for block in blocks if block]
+    
+    # Without one block per prompt the captions cannot be matched to images
+    if len(blocks) != len(prompts):
+        log.warning(f"⚠️ Batched captions returned {len(blocks)} blocks for {len(prompts)} prompts, falling back")
+        return captions
+    
+    for i, block in enumerate(blocks):
+        if len(block) == CAPTION_LINE_COUNT:
+            captions[i] = '\n'.join(block)
+    return captions
+
+def generate_all_captions(prompts, stop_event=None):
+    """Generate captions with caching and concurrent processing for 100x speed.
+    
+    Setting stop_event stops the stage before its next LLM call.
+    """
     log.info(f"📝 Starting cached concurrent caption generation for {len(prompts)} prompts")
     
+    def stopped():
+        return stop_event is not None and stop_event.is_set()
+    
     captions = [None] * len(prompts)  # Pre-allocate list
-    max_workers = MAX_CONCURRENT_CAPTIONS if not FAST_MODE else 1
+    max_workers = MAX_CONCURRENT_CAPTIONS
+    
+    if CAPTION_BATCH_SIZE > 0:
+        # Serve cached captions first, then caption the rest several prompts per request
+        uncached = []
+        for i, prompt in enumerate(prompts):
+            cached_caption = load_from_cache(f"caption_{hashlib.md5(prompt.encode()).hexdigest()}", max_age_hours=24)
+            if cached_caption:
+                captions[i] = cached_caption
+            else:
+                uncached.append(i)
+        
+        for batch_start in range(0, len(uncached), CAPTION_BATCH_SIZE):
+            if stopped():
+                break
+            batch_indices = uncached[batch_start:batch_start + CAPTION_BATCH_SIZE]
+            batch_captions = generate_captions_batched([prompts[i] for i in batch_indices])
+            for i, caption in zip(batch_indices, batch_captions):
+                if caption is None:
+                    continue
+                if not SKIP_CAPTION_DEDUPLICATION and not is_caption_unique(caption, [c for c in captions if c is not None]):
+                    continue
+                captions[i] = caption
+                save_to_cache(f"caption_{hashlib.md5(prompts[i].encode()).hexdigest()}", caption)
+        
+        log.info(f"📦 Batched captions covered {sum(c is not None for c in captions)}/{len(prompts)} prompts")
+    
+    # Captions accepted so far, shared by the workers so in-flight captions are deduplicated against each other
+    accepted_captions = [c for c in captions if c is not None]
+    accepted_lock = threading.Lock()
+    
+    def claim_caption(caption, force=False):
+        """Atomically accept caption unless an already accepted one is too similar"""
+        with accepted_lock:
+            if force or is_caption_unique(caption, accepted_captions):
+                accepted_captions.append(caption)
+                return True
+            return False
     
     def generate_caption_with_index(args):
         i, prompt = args
@@ -1479,16 +1925,28 @@ def generate_all_captions(prompts):
             # Try to load from cache first
             cached_caption = load_from_cache(cache_key, max_age_hours=24)
             if cached_caption:
-                log.debug(f"📦 Using cached caption for prompt: {prompt[:30]}...")
+                log.debug("📦 Using cached caption for prompt: %.30s...", prompt)
+                claim_caption(cached_caption, force=True)
                 return i, cached_caption, None
             
+            if stopped():
+                return i, None, "caption stage stopped"
+            
             if SKIP_CAPTION_DEDUPLICATION:
                 # Fast mode: skip deduplication
                 caption = generate_caption(prompt)
             else:
-                # Normal mode: ensure uniqueness
-                existing_captions = [c for c in captions if c is not None]
-                caption = generate_unique_caption(prompt, existing_captions)
+                # Normal mode: ensure uniqueness, re-checking under the lock since other workers may
+                # have accepted a similar caption while this one was being generated
+                for attempt in range(2):
+                    if attempt and stopped():
+                        # The first caption was rejected as a duplicate; don't cache or return it
+                        return i, None, "caption stage stopped"
+                    with accepted_lock:
+                        existing_captions = list(accepted_captions)
+                    caption = generate_unique_caption(prompt, existing_captions)
+                    if claim_caption(caption, force=attempt == 1):
+                        break
             
             # Save to cache
             save_to_cache(cache_key, caption)
@@ -1500,16 +1958,21 @@ def generate_all_captions(prompts):
     # Process in batches for better memory management
     batch_size = int(get_env('BATCH_SIZE', '25')) if BATCH_PROCESSING else len(prompts)
     
-    with tqdm(total=len(prompts), desc=f"📝 Generating captions", unit="caption") as pbar:
-        for batch_start in range(0, len(prompts), batch_size):
-            batch_end = min(batch_start + batch_size, len(prompts))
-            batch_prompts = prompts[batch_start:batch_end]
+    # Only prompts still without a caption go through the per-caption path
+    pending = [(i, prompt) for i, prompt in enumerate(prompts) if captions[i] is None]
+    
+    with tqdm(total=len(prompts), initial=len(prompts) - len(pending), desc=f"📝 Generating captions", unit="caption") as pbar:
+        for batch_start in range(0, len(pending), batch_size):
+            if stopped():
+                log.info("⏹️ Caption generation stopped")
+                break
+            batch_pending = pending[batch_start:batch_start + batch_size]
             
             with ThreadPoolExecutor(max_workers=max_workers) as executor:
                 # Submit batch tasks
                 future_to_index = {
                     executor.submit(generate_caption_with_index, (i, prompt)): i 
-                    for i, prompt in enumerate(batch_prompts, batch_start)
+                    for i, prompt in batch_pending
                 }
                 
                 # Process completed batch tasks
@@ -1519,7 +1982,7 @@ def generate_all_captions(prompts):
                     if caption:
                         captions[i] = caption
                         pbar.set_postfix_str(f"✅ Caption {i+1}")
-                    else:
+                    elif not stopped():
                         log.warning(f"⚠️ Failed to generate caption {i+1}: {error}")
                         pbar.set_postfix_str(f"❌ Failed")
                     
@@ -1529,9 +1992,8 @@ def generate_all_captions(prompts):
             if OPTIMIZE_MEMORY:
                 gc.collect()
     
-    # Filter out None values
-    captions = [c for c in captions if c is not None]
-    log.info(f"✅ Generated {len(captions)} captions with caching")
+    # Failed captions stay as None so the list lines up with the prompts (and their images)
+    log.info(f"✅ Generated {sum(c is not None for c in captions)} captions with caching")
     return captions
 
 # === 📄 PDF Generation ===
@@ -1542,27 +2004,25 @@ def place_caption_with_white_band(c, caption, w, h, page_num):
     The band has extra padding to separate it from the image boundary.
     """
     text = caption.split('\n')
-    font_size = int(get_env('PDF_FONT_SIZE', '14'))
-    line_spacing = int(get_env('PDF_LINE_SPACING', '18'))
-    padding_x = int(get_env('PDF_PADDING_X', '24'))
-    padding_y = int(get_env('PDF_PADDING_Y', '16'))
-    top_padding = int(get_env('PDF_TOP_PADDING', '40'))  # Increased top padding for better separation from image
+    font_size = PDF_FONT_SIZE
+    line_spacing = PDF_LINE_SPACING
+    padding_x = PDF_PADDING_X
+    padding_y = PDF_PADDING_Y
+    top_padding = PDF_TOP_PADDING
 
     # Calculate text dimensions
-    c.setFont("Helvetica-Bold", font_size)
-    text_width = max(c.stringWidth(line, "Helvetica-Bold", font_size) for line in text)
     text_height = len(text) * line_spacing
 
     band_height = text_height + 2 * padding_y + top_padding
-    band_y = int(get_env('PDF_BAND_Y', '0'))  # flush with the bottom of the page
-    band_x = int(get_env('PDF_BAND_X', '0'))
+    band_y = PDF_BAND_Y
+    band_x = PDF_BAND_X
     band_width = w
 
     # Draw white band
     c.setFillColorRGB(1, 1, 1)
     c.rect(band_x, band_y, band_width, band_height, fill=1, stroke=0)
 
-    # Draw caption (center-aligned, positioned above the bottom padding)
+    # Draw caption (center-aligned, positioned above the bottom padding); the page number reuses this font
     c.setFont("Helvetica-Bold", font_size)
     c.setFillColorRGB(0, 0, 0)
     for i, line in enumerate(text):
@@ -1571,9 +2031,47 @@ def place_caption_with_white_band(c, caption, w, h, page_num):
 
     # Draw page number (right-aligned, at the bottom of the white band, bold)
     page_str = str(page_num)
-    c.setFont("Helvetica-Bold", font_size)
     c.drawRightString(band_x + band_width - padding_x, band_y + padding_y, page_str)
 
+def find_existing_files(paths):
+    """Return the subset of paths that exist, scanning each parent directory once"""
+    files_by_dir = {}
+    for directory in {os.path.dirname(path) for path in paths}:
+        try:
+            with os.scandir(directory or '.') as it:
+                files_by_dir[directory] = {entry.name for entry in it if entry.is_file()}
+        except FileNotFoundError:
+            files_by_dir[directory] = set()
+    return {path for path in paths
+            if os.path.basename(path) in files_by_dir[os.path.dirname(path)]}
+
+def recompress_image_for_pdf(image_path, quality):
+    """Re-encode an image as an optimized progressive JPEG so it embeds smaller in the PDF"""
+    with Image.open(image_path) as im:
+        buf = BytesIO()
+        im.convert('RGB').save(buf, 'JPEG', quality=quality, optimize=True, progressive=True)
+    buf.seek(0)
+    return ImageReader(buf)
+
+def load_pdf_images(image_paths, jpeg_quality=0):
+    """Validate each page image once and return a reader per usable path, ready for drawImage"""
+    def load_image(image_path):
+        try:
+            # verify() checks the file's structure without decoding the pixels
+            with Image.open(image_path) as im:
+                im.verify()
+            return image_path, (recompress_image_for_pdf(image_path, jpeg_quality)
+                                if jpeg_quality else ImageReader(image_path))
+        except Exception as e:
+            log.error(f"❌ Unreadable image {image_path}: {e}")
+            return image_path, None
+    
+    # Pillow releases the GIL while decoding and encoding, so the pages load in parallel
+    # ahead of the canvas loop, which has to stay single-threaded
+    with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as executor:
+        loaded = executor.map(load_image, find_existing_files(image_paths))
+        return {image_path: reader for image_path, reader in loaded if reader is not None}
+
 def create_daily_pdf(images, captions, style_name, theme):
     """Create the daily PDF with all images and captions"""
     if not images:
@@ -1597,8 +2095,14 @@ def create_daily_pdf(images, captions, style_name, theme):
     log.info(f"📄 Creating PDF: {pdf_filename}")
     log.info(f"📊 Images to include: {len(images)}")
     
+    # Check and load every image up front instead of failing page by page inside the canvas
+    page_images = load_pdf_images(images, PDF_JPEG_QUALITY)
+    missing_count = len(set(images)) - len(page_images)
+    if missing_count:
+        log.warning(f"⚠️ {missing_count} images missing or unreadable, their pages will be skipped")
+    
     # Create PDF
-    c = canvas.Canvas(pdf_path, pagesize=A4)
+    c = canvas.Canvas(pdf_path, pagesize=A4, pageCompression=1)
     w, h = A4
     
     page_count = 0
@@ -1614,7 +2118,7 @@ def create_daily_pdf(images, captions, style_name, theme):
     c.setFont("Helvetica-Bold", 20)
     c.drawCentredString(w/2, h/2 + 10, f"Volume {year}.{day_of_year:03d}")
     c.setFont("Helvetica", 16)
-    c.drawCentredString(w/2, h/2 - 30, f"{datetime.now().strftime('%B %d, %Y')}")
+    c.drawCentredString(w/2, h/2 - 30, f"{today.strftime('%B %d, %Y')}")
     c.setFont("Helvetica-Bold", 18)
     c.drawCentredString(w/2, h/2 - 70, f"{style_name.capitalize()} Edition")
     c.setFont("Helvetica", 14)
@@ -1634,9 +2138,14 @@ def create_daily_pdf(images, captions, style_name, theme):
         
         for i, (image_path, caption) in enumerate(zip(images, captions)):
             pbar.set_description(f"📄 Adding page {i+1}/{len(images)}")
+            if image_path not in page_images:
+                pbar.set_postfix_str(f"❌ Missing")
+                log.error(f"❌ Image {i+1} not found or unreadable: {image_path}")
+                pbar.update(1)
+                continue
             try:
                 # Add image to PDF (full bleed)
-                c.drawImage(image_path, -20, -20, width=w+40, height=h+40)
+                c.drawImage(page_images[image_path], -20, -20, width=w+40, height=h+40)
                 
                 # Add caption with white band and page number
                 place_caption_with_white_band(c, caption, w, h, i + 1)
@@ -1696,6 +2205,8 @@ def main():
     parser.add_argument('--add-source', nargs=3, metavar=('NAME', 'URL', 'CATEGORY'), help='Add a single source manually')
     parser.add_argument('--remove-source', type=str, help='Remove a source by name')
     parser.add_argument('--batch-sources', action='store_true', help='Add batch of predefined sources')
+    parser.add_argument('--add-file', type=str, metavar='PATH', help='Bulk-add sources from a JSON list of {name, url, category}')
+    parser.add_argument('--no-cache', action='store_true', help='Skip the response cache and regenerate all LLM output')
     parser.add_argument('--fast', action='store_true', help='Enable fast mode (Free Tier Optimized)')
     parser.add_argument('--ultra', action='store_true', help='Enable ultra mode (Conservative Free Tier Optimization)')
     parser.add_argument('--convert-pdf', action='store_true', help='Convert latest PDF to Instagram images')
@@ -1711,7 +2222,11 @@ def main():
         logging.getLogger().setLevel(logging.DEBUG)
     
     # Declare global variables that might be modified
-    global FAST_MODE, SKIP_CAPTION_DEDUPLICATION, RATE_LIMIT_DELAY, MAX_CONCURRENT_IMAGES, MAX_CONCURRENT_CAPTIONS
+    global FAST_MODE, SKIP_CAPTION_DEDUPLICATION, RATE_LIMIT_DELAY, MAX_CONCURRENT_IMAGES, MAX_CONCURRENT_CAPTIONS, CACHE_ENABLED
+    
+    # Force fresh generation
+    if args.no_cache:
+        CACHE_ENABLED = False
     
     # Override settings for fast mode (Free Tier Optimized)
     if args.fast:
@@ -1726,6 +2241,7 @@ def main():
         RATE_LIMIT_DELAY = float(get_env('ULTRA_MODE_DELAY', '0.4'))
         MAX_CONCURRENT_IMAGES = int(get_env('ULTRA_MODE_CONCURRENT_IMAGES', '10'))
         MAX_CONCURRENT_CAPTIONS = int(get_env('ULTRA_MODE_CONCURRENT_CAPTIONS', '10'))
+        mount_http_adapter()
     
     # Handle sources management
     if args.sources:
@@ -1749,6 +2265,11 @@ def main():
         add_batch_manual_sources()
         return
     
+    # Handle bulk source addition from JSON
+    if args.add_file:
+        add_sources_from_file(args.add_file)
+        return
+    
     # Handle PDF to Instagram conversion
     if args.convert_pdf or args.instagram_posts or args.instagram_stories or args.both_formats:
         log.info("📸 Converting PDF to Instagram images...")
@@ -1817,8 +2338,6 @@ def main():
         
         pipeline_pbar.set_postfix_str(f"✅ Theme: {theme[:30]}...")
         pipeline_pbar.update(1)
-        if not FAST_MODE:
-            time.sleep(2)  # Rate limiting between major steps
         
         # Step 2: Select daily style
         log.info("=" * 60)
@@ -1854,31 +2373,47 @@ def main():
         if not FAST_MODE:
             time.sleep(2)  # Rate limiting between major steps
         
-        # Step 4: Generate images in one style (sequential)
-        log.info("=" * 60)
-        log.info(f"🖼️ STEP 4/6: Generating {len(prompts)} images sequentially")
-        log.info("=" * 60)
-        pipeline_pbar.set_description(f"🖼️ Step 4/6: Image Generation")
-        images = generate_all_images(prompts, style_name)
-        if not images:
-            log.error("❌ Failed to generate images")
-            return
-        log.info(f"✅ Generated {len(images)} images")
-        pipeline_pbar.set_postfix_str(f"✅ {len(images)} images")
+        # Captions depend only on the prompts, so generate them while the images render
+        stop_captions = threading.Event()
+        stage_executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            captions_future = stage_executor.submit(generate_all_captions, prompts, stop_captions)
+            
+            # Step 4: Generate images in one style (concurrent)
+            log.info("=" * 60)
+            log.info(f"🖼️ STEP 4/6: Generating {len(prompts)} images concurrently")
+            log.info("=" * 60)
+            pipeline_pbar.set_description(f"🖼️ Step 4/6: Image Generation")
+            images = generate_all_images(prompts, style_name)
+            image_count = sum(image is not None for image in images)
+            if not image_count:
+                log.error("❌ Failed to generate images")
+                return
+            log.info(f"✅ Generated {image_count} images")
+            pipeline_pbar.set_postfix_str(f"✅ {image_count} images")
+            pipeline_pbar.update(1)
+            
+            # Step 5: Generate captions (concurrent, started alongside step 4)
+            log.info("=" * 60)
+            log.info("📝 STEP 5/6: Generating captions concurrently")
+            log.info("=" * 60)
+            pipeline_pbar.set_description(f"📝 Step 5/6: Caption Generation")
+            captions = captions_future.result()
+        finally:
+            # On an early return or error the caption stage stops before its next LLM call
+            stop_captions.set()
+            stage_executor.shutdown(cancel_futures=True)
+        log.info(f"✅ Generated {sum(c is not None for c in captions)} captions")
+        pipeline_pbar.set_postfix_str(f"✅ {sum(c is not None for c in captions)} captions")
         pipeline_pbar.update(1)
-        if not FAST_MODE:
-            time.sleep(2)  # Rate limiting between major steps
         
-        # Step 5: Generate captions (sequential)
-        log.info("=" * 60)
-        log.info("📝 STEP 5/6: Generating captions sequentially")
-        log.info("=" * 60)
-        pipeline_pbar.set_description(f"📝 Step 5/6: Caption Generation")
-        captions = generate_all_captions(prompts)
-        log.info(f"✅ Generated {len(captions)} captions")
-        pipeline_pbar.set_postfix_str(f"✅ {len(captions)} captions")
-        pipeline_pbar.update(1)
-        time.sleep(2)  # Rate limiting between major steps
+        # Both lists are indexed by prompt; drop a page only when its image or its caption failed
+        pages = [(image, caption) for image, caption in zip(images, captions)
+                 if image is not None and caption is not None]
+        if len(pages) < len(prompts):
+            log.warning(f"⚠️ Dropping {len(prompts) - len(pages)} pages with a missing image or caption")
+        images = [image for image, _ in pages]
+        captions = [caption for _, caption in pages]
         
         # Step 6: Create PDF
         log.info("=" * 60)
@@ -1904,6 +2439,7 @@ def main():
             log.info(f"🎯 Theme: {theme}")
             log.info(f"⚡ Total Time: {total_time:.2f} seconds")
             log.info(f"🚀 Performance: {images_per_second:.2f} images/second")
+            log_llm_usage_summary()
             log.info(f"🎯 Speed Improvement: ~10x faster than sequential mode")
             log.info("✅ All steps completed with concurrent processing!")
         else:
@@ -1913,67 +2449,56 @@ def main():
 def get_latest_pdf():
     """Get the most recent PDF file from daily_pdfs directory"""
     pdf_dir = Path("daily_pdfs")
-    if not pdf_dir.exists():
+    
+    # The scan doubles as the existence check, and each PDF is stat'ed exactly once
+    try:
+        with os.scandir(pdf_dir) as it:
+            pdf_files = [(entry.stat().st_mtime, entry.path) for entry in it if entry.name.endswith('.pdf')]
+    except FileNotFoundError:
         log.error("❌ daily_pdfs directory not found")
         return None
-    
-    pdf_files = list(pdf_dir.glob("*.pdf"))
     if not pdf_files:
         log.error("❌ No PDF files found in daily_pdfs directory")
         return None
     
     # Get the most recent PDF
-    latest_pdf = max(pdf_files, key=lambda x: x.stat().st_mtime)
+    latest_pdf = Path(max(pdf_files)[1])
     log.info(f"📄 Found latest PDF: {latest_pdf.name}")
     return latest_pdf
 
-def convert_pdf_to_instagram_images(pdf_path, output_dir="instagram_images", dpi=300):
-    """Convert PDF pages to Instagram-optimized PNG images"""
+def render_pdf_to_canvas_images(pdf_path, output_dir, canvas_size, filename_prefix, label, dpi=300):
+    """Render each PDF page centred on a white canvas of canvas_size and save it as PNG"""
     
     # Create output directory
     output_path = Path(output_dir)
     output_path.mkdir(exist_ok=True)
     
-    log.info(f"🔄 Converting PDF to Instagram images...")
+    log.info(f"🔄 Converting PDF to Instagram {label}...")
     log.info(f"📁 Output directory: {output_path}")
     
     try:
         # Import PyMuPDF
         import fitz
-        import io
         
         # Open PDF with PyMuPDF
         doc = fitz.open(pdf_path)
         
-        # Instagram dimensions (square format)
-        instagram_size = (1080, 1080)  # Instagram square post
+        # Calculate zoom factor for desired DPI
+        zoom = dpi / 72  # PyMuPDF uses 72 DPI as base
+        mat = fitz.Matrix(zoom, zoom)
         
         converted_images = []
         
         for page_num in range(len(doc)):
             log.info(f"📄 Processing page {page_num+1}/{len(doc)}")
             
-            # Get page
-            page = doc.load_page(page_num)
-            
-            # Calculate zoom factor for desired DPI
-            zoom = dpi / 72  # PyMuPDF uses 72 DPI as base
-            mat = fitz.Matrix(zoom, zoom)
-            
-            # Render page to image
-            pix = page.get_pixmap(matrix=mat)
-            
-            # Convert to PIL Image
-            img_data = pix.tobytes("png")
-            image = Image.open(io.BytesIO(img_data))
+            # Render page straight to RGB pixels, skipping a PNG encode/decode round trip
+            pix = doc.load_page(page_num).get_pixmap(matrix=mat, alpha=False)
+            image = Image.frombytes('RGB', (pix.width, pix.height), pix.samples)
             
-            # Convert to RGB if necessary
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
-            
-            # Resize to Instagram dimensions while maintaining aspect ratio
+            # Resize to canvas dimensions while maintaining aspect ratio
             img_width, img_height = image.size
-            scale = min(instagram_size[0] / img_width, instagram_size[1] / img_height)
+            scale = min(canvas_size[0] / img_width, canvas_size[1] / img_height)
             
             new_width = int(img_width * scale)
             new_height = int(img_height * scale)
@@ -1981,113 +2506,40 @@ def convert_pdf_to_instagram_images(pdf_path, output_dir="instagram_images", dpi
             # Resize image
             resized_image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
             
-            # Create square canvas with white background
-            square_image = Image.new('RGB', instagram_size, 'white')
-            
-            # Center the resized image on the square canvas
-            x_offset = (instagram_size[0] - new_width) // 2
-            y_offset = (instagram_size[1] - new_height) // 2
-            square_image.paste(resized_image, (x_offset, y_offset))
+            # Center the resized image on a white canvas
+            canvas_image = Image.new('RGB', canvas_size, 'white')
+            x_offset = (canvas_size[0] - new_width) // 2
+            y_offset = (canvas_size[1] - new_height) // 2
+            canvas_image.paste(resized_image, (x_offset, y_offset))
             
             # Save as PNG
-            output_filename = f"instagram_page_{page_num+1:02d}.png"
+            output_filename = f"{filename_prefix}_{page_num+1:02d}.png"
             output_file = output_path / output_filename
-            square_image.save(output_file, 'PNG', quality=95)
+            canvas_image.save(output_file, 'PNG', quality=95)
             
             converted_images.append(str(output_file))
             log.info(f"✅ Saved: {output_filename}")
         
         doc.close()
-        log.info(f"🎉 Converted {len(converted_images)} pages to Instagram images")
+        log.info(f"🎉 Converted {len(converted_images)} pages to Instagram {label}")
         return converted_images
         
     except ImportError:
         log.error("❌ PyMuPDF not installed. Install with: pip install PyMuPDF")
         return None
-    except Exception as e:
-        log.error(f"❌ PDF conversion failed: {e}")
+    except Exception:
+        log.exception(f"❌ Instagram {label} conversion failed")
         return None
 
+def convert_pdf_to_instagram_images(pdf_path, output_dir="instagram_images", dpi=300):
+    """Convert PDF pages to Instagram-optimized PNG images"""
+    # Instagram square post
+    return render_pdf_to_canvas_images(pdf_path, output_dir, (1080, 1080), "instagram_page", "images", dpi)
+
 def create_instagram_story_images(pdf_path, output_dir="instagram_stories", dpi=300):
     """Convert PDF pages to Instagram story format (9:16 aspect ratio)"""
-    
-    # Create output directory
-    output_path = Path(output_dir)
-    output_path.mkdir(exist_ok=True)
-    
-    log.info(f"🔄 Converting PDF to Instagram stories...")
-    log.info(f"📁 Output directory: {output_path}")
-    
-    try:
-        # Import PyMuPDF
-        import fitz
-        import io
-        
-        # Open PDF with PyMuPDF
-        doc = fitz.open(pdf_path)
-        
-        # Instagram story dimensions (9:16 aspect ratio)
-        story_size = (1080, 1920)  # Instagram story format
-        
-        converted_stories = []
-        
-        for page_num in range(len(doc)):
-            log.info(f"📄 Processing story {page_num+1}/{len(doc)}")
-            
-            # Get page
-            page = doc.load_page(page_num)
-            
-            # Calculate zoom factor for desired DPI
-            zoom = dpi / 72  # PyMuPDF uses 72 DPI as base
-            mat = fitz.Matrix(zoom, zoom)
-            
-            # Render page to image
-            pix = page.get_pixmap(matrix=mat)
-            
-            # Convert to PIL Image
-            img_data = pix.tobytes("png")
-            image = Image.open(io.BytesIO(img_data))
-            
-            # Convert to RGB if necessary
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
-            
-            # Resize to Instagram story dimensions while maintaining aspect ratio
-            img_width, img_height = image.size
-            scale = min(story_size[0] / img_width, story_size[1] / img_height)
-            
-            new_width = int(img_width * scale)
-            new_height = int(img_height * scale)
-            
-            # Resize image
-            resized_image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            
-            # Create story canvas with white background
-            story_image = Image.new('RGB', story_size, 'white')
-            
-            # Center the resized image on the story canvas
-            x_offset = (story_size[0] - new_width) // 2
-            y_offset = (story_size[1] - new_height) // 2
-            story_image.paste(resized_image, (x_offset, y_offset))
-            
-            # Save as PNG
-            output_filename = f"instagram_story_{page_num+1:02d}.png"
-            output_file = output_path / output_filename
-            story_image.save(output_file, 'PNG', quality=95)
-            
-            converted_stories.append(str(output_file))
-            log.info(f"✅ Saved: {output_filename}")
-        
-        doc.close()
-        log.info(f"🎉 Converted {len(converted_stories)} pages to Instagram stories")
-        return converted_stories
-        
-    except ImportError:
-        log.error("❌ PyMuPDF not installed. Install with: pip install PyMuPDF")
-        return None
-    except Exception as e:
-        log.error(f"❌ Story conversion failed: {e}")
-        return None
+    # Instagram story format
+    return render_pdf_to_canvas_images(pdf_path, output_dir, (1080, 1920), "instagram_story", "stories", dpi)
 
 def convert_latest_pdf_to_instagram():
     """Convert the latest PDF to both Instagram posts and stories"""